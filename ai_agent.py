@@ -8,15 +8,32 @@ and AI decision-making components into a cohesive agent system.
 
 import os
 import sys
+import re
 import json
+import math
+import time
+import hashlib
 import logging
 import argparse
-from typing import Dict, List, Optional, Tuple, Union, Any
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from dataclasses import dataclass, fields
+from typing import Deque, Dict, List, Optional, Tuple, Union, Any
 
-# Import component modules
-from terminal_control import TerminalController
-from web_interaction import WebController
-from ai_decision import AIDecisionMaker
+# Component modules (terminal_control, web_interaction, ai_decision) are
+# imported in AIAgent.__init__ so that importing this module stays cheap
+
+# orjson is optional; it serializes results several times faster than json
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode("utf-8")
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
 
 # Configure logging
 logging.basicConfig(
@@ -25,36 +42,466 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ai_agent')
 
+# Precompiled patterns used to extract actions from AI responses. _ACTIONS_RE
+# matches either a terminal code block or a BROWSER_ACTION line so a response
+# can be scanned once.
+_ACTIONS_RE = re.compile(
+    r"(?P<term>```(?:bash|shell|sh)?\s*(?P<command>.*?)\s*```)"
+    r"|(?P<browser>BROWSER_ACTION:\s*(?P<action>\w+)(?:\s+(?P<params>[^\n]+))?)",
+    re.DOTALL
+)
+# key=value parameter pairs; values containing spaces must be double-quoted
+_KV_RE = re.compile(r'(\w+)=("[^"]*"|\S+)')
+_URL_RE = re.compile(r"(?:navigate to|go to)\s+(https?://[^\s]+)")
+_PLAN_URL_RE = re.compile(r"(https?://[^\s]+)")
+
+# Maximum number of independent plan steps executed at the same time
+PLAN_MAX_WORKERS = 4
+
+# Upper bound on how much of each output stream a terminal command may keep in memory
+MAX_COMMAND_OUTPUT = 1024 * 1024
+
+def _unknown_action() -> Dict[str, Any]:
+    """
+    Return the result used for unknown or incomplete browser actions.
+    """
+    return {"success": False, "message": "Unknown action"}
+
+def _truncate(text: str, limit: int = 500) -> str:
+    """
+    Truncate text to a maximum length, only allocating when it is too long.
+    
+    Args:
+        text: The text to truncate.
+        limit: The maximum number of characters to keep.
+        
+    Returns:
+        The text itself, or its first `limit` characters followed by "...".
+    """
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def parse_actions(response: str) -> List[Dict[str, Any]]:
+    """
+    Parse actions from an AI response.
+    
+    Terminal commands come from code blocks and browser actions from
+    BROWSER_ACTION lines. If any are found, the remaining text is added as a
+    final 'response' action.
+    
+    Args:
+        response: The AI-generated response.
+        
+    Returns:
+        A list of action dictionaries.
+    """
+    actions = []
+    # Slices of the response outside any code block or action line
+    text_parts = []
+    position = 0
+    
+    # Scan once for terminal code blocks and browser actions, in the order they
+    # appear; plain text answers without either sentinel skip the regex entirely
+    has_sentinel = "```" in response or "BROWSER_ACTION:" in response
+    matches = _ACTIONS_RE.finditer(response) if has_sentinel else ()
+    for match in matches:
+        text_parts.append(response[position:match.start()])
+        position = match.end()
+        
+        if match.group("term") is not None:
+            cmd = match.group("command")
+            # Skip if it looks like code rather than a command
+            if len(cmd.splitlines()) > 5 or "def " in cmd or "class " in cmd:
+                continue
+            
+            actions.append({
+                "type": "terminal",
+                "command": cmd.strip()
+            })
+        else:
+            # Parse key=value pairs, allowing quoted values with spaces
+            params_str = match.group("params") or ""
+            params = {m.group(1): m.group(2).strip('"') for m in _KV_RE.finditer(params_str)}
+            
+            actions.append({
+                "type": "browser",
+                "action": match.group("action").lower(),
+                "params": params
+            })
+    text_parts.append(response[position:])
+    
+    # If no structured actions found, check for common browser action phrases
+    if not actions:
+        lowered = response.lower()
+        if "navigate to" in lowered or "go to" in lowered:
+            url_match = _URL_RE.search(lowered)
+            if url_match:
+                actions.append({
+                    "type": "browser",
+                    "action": "navigate",
+                    "params": {"url": url_match.group(1)}
+                })
+    
+    # If we extracted actions, also add the text response
+    if actions:
+        # Keep only the text outside the code blocks and action commands
+        clean_response = "".join(text_parts).strip()
+        
+        actions.append({
+            "type": "response",
+            "text": clean_response
+        })
+    
+    return actions
+
+@dataclass(slots=True)
+class AgentContext:
+    """
+    Mutable snapshot of the agent's state that is shared with the AI.
+    
+    Fields are declared from least to most volatile, which is also the
+    order in which the context is serialized into a prompt.
+    """
+    terminal_dir: str = ""
+    browser_url: Optional[str] = None
+    browser_title: Optional[str] = None
+    last_browser_action: Optional[Dict[str, Any]] = None
+    last_command: Optional[str] = None
+    last_result: Optional[Dict[str, Any]] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the context as a plain dictionary for serialization.
+        
+        Unlike dataclasses.asdict this does not deep-copy nested values.
+        """
+        return {name: getattr(self, name) for name in _AGENT_CONTEXT_FIELDS}
+
+_AGENT_CONTEXT_FIELDS = tuple(f.name for f in fields(AgentContext))
+
+class _ResponseCache:
+    """
+    LRU cache of AI responses keyed by the request and the parts of the
+    context that affect the answer (working directory and browser URL).
+    
+    Only responses without terminal or browser actions are cached. The key
+    leaves out the conversation, so a follow-up like "yes" or "try again"
+    must never replay commands from an earlier, unrelated exchange, and
+    similar requests such as "rm a.txt" and "rm b.txt" must never replay
+    each other's.
+    
+    An optional semantic tier reuses a cached response when a new request
+    is close enough in embedding space to a previous one in the same context.
+    """
+    
+    def __init__(self, max_size: int = 128, embed_fn=None, threshold: float = 0.95):
+        """
+        Initialize the response cache.
+        
+        Args:
+            max_size: Maximum number of cached responses. 0 disables the cache.
+            embed_fn: Optional callable mapping text to an embedding vector.
+                      Enables the semantic tier when provided.
+            threshold: Minimum cosine similarity for a semantic cache hit.
+        """
+        self.max_size = max_size
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._embeddings = OrderedDict()
+        # Embedding computed by the last get(), reused by the put() that
+        # follows a miss for the same request
+        self._last_embedding: Tuple[Optional[str], Optional[List[float]]] = (None, None)
+    
+    @staticmethod
+    def _context_key(context: Dict[str, Any]) -> str:
+        return json.dumps(
+            {"cwd": context.get("terminal_dir"), "url": context.get("browser_url")},
+            sort_keys=True
+        )
+    
+    @staticmethod
+    def _normalize(request: str) -> str:
+        return " ".join(request.lower().split())
+    
+    def _key(self, request: str, context: Dict[str, Any]) -> str:
+        raw = json.dumps(
+            {"r": self._normalize(request), "ctx": self._context_key(context)},
+            sort_keys=True
+        )
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _cosine(a: List[float], b: List[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+    
+    def get(self, request: str, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up a cached response for a request in the given context.
+        
+        Args:
+            request: The user's request.
+            context: The agent context the request is made in.
+            
+        Returns:
+            The cached response, or None on a miss.
+        """
+        if self.max_size <= 0:
+            return None
+        
+        key = self._key(request, context)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        
+        if self.embed_fn is None:
+            return None
+        
+        normalized = self._normalize(request)
+        embedding = self.embed_fn(normalized)
+        self._last_embedding = (normalized, embedding)
+        if not embedding:
+            return None
+        
+        context_key = self._context_key(context)
+        best_key, best_score = None, self.threshold
+        for cached_key, (cached_context, cached_embedding) in self._embeddings.items():
+            if cached_context != context_key:
+                continue
+            score = self._cosine(embedding, cached_embedding)
+            if score >= best_score:
+                best_key, best_score = cached_key, score
+        
+        if best_key is None or best_key not in self._entries:
+            return None
+        
+        logger.debug(f"Semantic cache hit with similarity {best_score:.3f}")
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key]
+    
+    def put(self, request: str, context: Dict[str, Any], response: str):
+        """
+        Store a response for a request in the given context, unless it
+        contains terminal or browser actions.
+        
+        Args:
+            request: The user's request.
+            context: The agent context the request was made in.
+            response: The AI response to cache.
+        """
+        if self.max_size <= 0 or parse_actions(response):
+            # Responses that would execute actions are never replayed
+            self._last_embedding = (None, None)
+            return
+        
+        key = self._key(request, context)
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        
+        if self.embed_fn is not None and key not in self._embeddings:
+            normalized = self._normalize(request)
+            last_request, embedding = self._last_embedding
+            if last_request != normalized:
+                embedding = self.embed_fn(normalized)
+            if embedding:
+                self._embeddings[key] = (self._context_key(context), embedding)
+        self._last_embedding = (None, None)
+        
+        while len(self._entries) > self.max_size:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._embeddings.pop(evicted_key, None)
+    
+    def clear(self):
+        """
+        Remove all cached responses.
+        """
+        self._entries.clear()
+        self._embeddings.clear()
+        self._last_embedding = (None, None)
+
+class _PlanCache:
+    """
+    LRU cache of generated plans keyed by the normalized goal, optionally
+    persisted to a JSON file so plans survive restarts.
+    """
+    
+    def __init__(self, max_size: int = 64, path: Optional[str] = None):
+        """
+        Initialize the plan cache.
+        
+        Args:
+            max_size: Maximum number of cached plans. 0 disables the cache.
+            path: Optional JSON file used to persist the cache.
+        """
+        self.max_size = max_size
+        self.path = os.path.expanduser(path) if path else None
+        self._plans = OrderedDict()
+        self._load()
+    
+    @staticmethod
+    def _key(goal: str) -> str:
+        normalized = " ".join(goal.strip().lower().split())
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._plans.update(json.load(f))
+            while len(self._plans) > max(self.max_size, 0):
+                self._plans.popitem(last=False)
+            logger.info(f"Loaded {len(self._plans)} cached plans from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load plan cache from {self.path}: {str(e)}")
+    
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a partial cache
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".plans-", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._plans, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                # Do not leave the temporary file behind
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.warning(f"Could not save plan cache to {self.path}: {str(e)}")
+    
+    def get(self, goal: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Look up a cached plan for a goal.
+        
+        Args:
+            goal: The goal to look up.
+            
+        Returns:
+            The cached plan, or None on a miss.
+        """
+        if self.max_size <= 0:
+            return None
+        
+        key = self._key(goal)
+        if key not in self._plans:
+            return None
+        self._plans.move_to_end(key)
+        return self._plans[key]
+    
+    def put(self, goal: str, plan: List[Dict[str, str]]):
+        """
+        Store a plan for a goal.
+        
+        Args:
+            goal: The goal the plan achieves.
+            plan: The generated plan.
+        """
+        if self.max_size <= 0:
+            return
+        
+        key = self._key(goal)
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+        self._save()
+
 class AIAgent:
     """
     Main AI Agent class that integrates all components and
     provides a unified interface for agent operations.
     """
     
-    def __init__(self, api_key: Optional[str] = None, headless: bool = True):
+    def __init__(self, api_key: Optional[str] = None, headless: bool = True,
+                 cache_size: int = 128, semantic_cache: bool = False,
+                 plan_cache_size: int = 64, plan_cache_path: Optional[str] = None,
+                 history_limit: int = 128):
         """
         Initialize the AI Agent with all its components.
         
         Args:
             api_key: OpenAI API key. If None, tries to get from environment variable.
             headless: Whether to run the browser in headless mode.
+            cache_size: Maximum number of cached AI responses. Only responses without
+                        terminal or browser actions are cached. 0 disables caching.
+            semantic_cache: Whether to reuse responses for semantically similar requests.
+            plan_cache_size: Maximum number of cached plans. 0 disables plan caching.
+            plan_cache_path: Optional JSON file used to persist cached plans.
+            history_limit: Maximum number of processed requests kept in task_history.
         """
         logger.info("Initializing AI Agent system")
         
-        # Initialize components
-        self.terminal = TerminalController()
+        # Initialize components, importing them only when an agent is created
+        from terminal_control import TerminalController
+        # Commands run through one persistent bash, so shell syntax such as
+        # `;`, `|` and `&` is interpreted rather than passed on literally
+        self.terminal = TerminalController(persistent=True)
+        
+        from web_interaction import WebController, WebDriverException
         self.web = WebController(headless=headless)
+        self._web_errors = (WebDriverException,)
+        
+        from ai_decision import AIDecisionMaker
         self.ai = AIDecisionMaker(api_key=api_key)
+        self.response_cache = _ResponseCache(
+            max_size=cache_size,
+            embed_fn=self.ai.generate_embedding if semantic_cache else None
+        )
+        self._plan_cache = _PlanCache(max_size=plan_cache_size, path=plan_cache_path)
+        
+        # Static context never changes after initialization, so it can be sent
+        # as part of the cacheable prompt prefix
+        self._static_context = {
+            "capabilities": ["terminal", "browser"],
+            "terminal_command_format": "A single command inside a ```bash code block",
+            "browser_action_format": 'BROWSER_ACTION: <action> key=value key="value with spaces" ...',
+            "browser_actions": {
+                "navigate": ["url"],
+                "click": ["selector_type", "selector_value"],
+                "input": ["selector_type", "selector_value", "text"],
+                "extract": ["content_type"],
+                "screenshot": ["filename"]
+            }
+        }
+        
+        # Selenium and the conversation history are not thread-safe, so
+        # concurrent plan steps take turns on them
+        self._browser_lock = threading.RLock()
+        self._ai_lock = threading.Lock()
+        # Guards current_context; always taken after _browser_lock, never before
+        self._context_lock = threading.Lock()
+        
+        # Dispatch tables for browser actions and plan step types
+        self._browser_handlers = {
+            "navigate": self._do_navigate,
+            "click": self._do_click,
+            "input": self._do_input,
+            "extract": self._do_extract,
+            "screenshot": self._do_screenshot
+        }
+        self._plan_step_handlers = {
+            "terminal": self._plan_terminal_step,
+            "command": self._plan_terminal_step,
+            "shell": self._plan_terminal_step,
+            "browser": self._plan_browser_step,
+            "web": self._plan_browser_step,
+            "navigate": self._plan_browser_step
+        }
         
         # Initialize agent state
+        self._web_dirty = False
         self.current_task = None
-        self.task_history = []
-        self.current_context = {
-            "terminal_dir": self.terminal.working_dir,
-            "browser_url": None,
-            "last_command": None,
-            "last_result": None
-        }
+        self.task_history: Deque[Dict[str, str]] = deque(maxlen=history_limit)
+        self.current_context = AgentContext(terminal_dir=self.terminal.working_dir)
         
         logger.info("AI Agent system initialized successfully")
     
@@ -62,24 +509,54 @@ class AIAgent:
         """
         Update the current context with the latest state information.
         """
-        self.current_context["terminal_dir"] = self.terminal.working_dir
-        
-        if hasattr(self.web, 'driver') and self.web.driver:
-            try:
-                self.current_context["browser_url"] = self.web.get_current_url()
-                self.current_context["browser_title"] = self.web.get_page_title()
-            except:
-                self.current_context["browser_url"] = None
-                self.current_context["browser_title"] = None
+        with self._context_lock:
+            self.current_context.terminal_dir = self.terminal.working_dir
+        
+        # Only query the browser when a browser action may have changed its state.
+        # If another step holds the browser, skip the query: that step updates the
+        # context itself before releasing the lock
+        if not self._browser_lock.acquire(blocking=False):
+            return
+        try:
+            if self._web_dirty and hasattr(self.web, 'driver') and self.web.driver:
+                try:
+                    browser_url = self.web.get_current_url()
+                    browser_title = self.web.get_page_title()
+                except self._web_errors:
+                    browser_url = browser_title = None
+                with self._context_lock:
+                    self.current_context.browser_url = browser_url
+                    self.current_context.browser_title = browser_title
+                self._web_dirty = False
+        finally:
+            self._browser_lock.release()
         
         logger.debug("Context updated")
     
-    def execute_terminal_command(self, command: str) -> Dict[str, Any]:
+    def _context_for_prompt(self) -> Dict[str, Any]:
+        """
+        Take a consistent copy of the current context for a prompt.
+        
+        Fields keep the AgentContext declaration order. The context message
+        is sent just before the newest user message, so its position changes
+        every turn anyway and reordering its keys would not extend the cached
+        prompt prefix.
+        
+        Returns:
+            The context as a dictionary.
+        """
+        with self._context_lock:
+            return self.current_context.to_dict()
+    
+    def execute_terminal_command(self, command: str,
+                                 max_output: Optional[int] = MAX_COMMAND_OUTPUT) -> Dict[str, Any]:
         """
         Execute a terminal command and update context.
         
         Args:
             command: The command to execute.
+            max_output: Maximum number of characters kept from each output stream.
+                        None keeps the full output.
             
         Returns:
             The command result.
@@ -87,15 +564,17 @@ class AIAgent:
         logger.info(f"Executing terminal command: {command}")
         
         # Execute the command
-        result = self.terminal.execute_command(command)
+        result = self.terminal.execute_command(command, max_output=max_output)
         
         # Update context
-        self.current_context["last_command"] = command
-        self.current_context["last_result"] = {
+        last_result = {
             "status": result["status"],
-            "stdout": result["stdout"][:500] + ("..." if len(result["stdout"]) > 500 else ""),
-            "stderr": result["stderr"][:500] + ("..." if len(result["stderr"]) > 500 else "")
+            "stdout": _truncate(result["stdout"].rstrip()),
+            "stderr": _truncate(result["stderr"].rstrip())
         }
+        with self._context_lock:
+            self.current_context.last_command = command
+            self.current_context.last_result = last_result
         self.update_context()
         
         return result
@@ -111,64 +590,91 @@ class AIAgent:
         Returns:
             The action result.
         """
+        with self._browser_lock:
+            return self._execute_browser_action(action, **kwargs)
+    
+    def _execute_browser_action(self, action: str, **kwargs) -> Dict[str, Any]:
+        """
+        Execute a browser action while holding the browser lock.
+        """
         logger.info(f"Executing browser action: {action}")
         
-        result = {"success": False, "message": "Unknown action"}
-        
         # Execute the requested browser action
-        if action == "navigate":
-            url = kwargs.get("url")
-            if url:
-                success = self.web.navigate_to(url)
-                result = {"success": success, "message": f"Navigated to {url}" if success else f"Failed to navigate to {url}"}
-        
-        elif action == "click":
-            selector_type = kwargs.get("selector_type", "id")
-            selector_value = kwargs.get("selector_value")
-            if selector_value:
-                element = self.web.find_element(selector_type, selector_value)
-                if element:
-                    success = self.web.click_element(element)
-                    result = {"success": success, "message": f"Clicked element {selector_value}" if success else f"Failed to click element {selector_value}"}
-                else:
-                    result = {"success": False, "message": f"Element not found: {selector_value}"}
-        
-        elif action == "input":
-            selector_type = kwargs.get("selector_type", "id")
-            selector_value = kwargs.get("selector_value")
-            text = kwargs.get("text", "")
-            if selector_value:
-                element = self.web.find_element(selector_type, selector_value)
-                if element:
-                    success = self.web.input_text(element, text)
-                    result = {"success": success, "message": f"Input text to element {selector_value}" if success else f"Failed to input text to element {selector_value}"}
-                else:
-                    result = {"success": False, "message": f"Element not found: {selector_value}"}
-        
-        elif action == "extract":
-            content_type = kwargs.get("content_type", "text")
-            if content_type == "text":
-                text = self.web.extract_text()
-                result = {"success": True, "message": "Text extracted", "content": text[:1000] + ("..." if len(text) > 1000 else "")}
-            elif content_type == "links":
-                links = self.web.extract_links()
-                result = {"success": True, "message": f"Extracted {len(links)} links", "content": links[:20]}
-        
-        elif action == "screenshot":
-            filename = kwargs.get("filename", "screenshot.png")
-            success = self.web.take_screenshot(filename)
-            result = {"success": success, "message": f"Screenshot saved to {filename}" if success else f"Failed to take screenshot"}
+        handler = self._browser_handlers.get(action)
+        result = handler(**kwargs) if handler else _unknown_action()
+        
+        # Navigation, clicks and any successful action may change the page
+        if action in ("navigate", "click") or result["success"]:
+            self._web_dirty = True
         
         # Update context
-        self.current_context["last_browser_action"] = {
-            "action": action,
-            "params": kwargs,
-            "result": result["message"]
-        }
+        with self._context_lock:
+            self.current_context.last_browser_action = {
+                "action": action,
+                "params": kwargs,
+                "result": result["message"]
+            }
         self.update_context()
         
         return result
     
+    def _resolve_element(self, kwargs: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """
+        Find the element targeted by a click or input action.
+        
+        Args:
+            kwargs: The action arguments with 'selector_type' and 'selector_value'.
+            
+        Returns:
+            A tuple of (selector_value, element). The element is None if it was not
+            found, and both are None if no selector value was given.
+        """
+        selector_value = kwargs.get("selector_value")
+        if not selector_value:
+            return None, None
+        return selector_value, self.web.find_element(kwargs.get("selector_type", "id"), selector_value)
+    
+    def _do_navigate(self, **kwargs) -> Dict[str, Any]:
+        url = kwargs.get("url")
+        if not url:
+            return _unknown_action()
+        success = self.web.navigate_to(url)
+        return {"success": success, "message": f"Navigated to {url}" if success else f"Failed to navigate to {url}"}
+    
+    def _do_click(self, **kwargs) -> Dict[str, Any]:
+        selector_value, element = self._resolve_element(kwargs)
+        if not selector_value:
+            return _unknown_action()
+        if not element:
+            return {"success": False, "message": f"Element not found: {selector_value}"}
+        success = self.web.click_element(element)
+        return {"success": success, "message": f"Clicked element {selector_value}" if success else f"Failed to click element {selector_value}"}
+    
+    def _do_input(self, **kwargs) -> Dict[str, Any]:
+        selector_value, element = self._resolve_element(kwargs)
+        if not selector_value:
+            return _unknown_action()
+        if not element:
+            return {"success": False, "message": f"Element not found: {selector_value}"}
+        success = self.web.input_text(element, kwargs.get("text", ""))
+        return {"success": success, "message": f"Input text to element {selector_value}" if success else f"Failed to input text to element {selector_value}"}
+    
+    def _do_extract(self, **kwargs) -> Dict[str, Any]:
+        content_type = kwargs.get("content_type", "text")
+        if content_type == "text":
+            # One extra character tells whether the text was cut
+            text = self.web.extract_text(max_chars=1001)
+            return {"success": True, "message": "Text extracted", "content": _truncate(text, 1000)}
+        if content_type == "links":
+            links = self.web.extract_links(limit=20)
+            return {"success": True, "message": f"Extracted {len(links)} links", "content": links}
+        return _unknown_action()
+    
+    def _do_screenshot(self, **kwargs) -> Dict[str, Any]:
+        filename = kwargs.get("filename", "screenshot.png")
+        success = self.web.take_screenshot(filename)
+        return {"success": success, "message": f"Screenshot saved to {filename}" if success else "Failed to take screenshot"}
+    
     def process_user_request(self, request: str) -> Dict[str, Any]:
         """
         Process a user request using AI to determine and execute actions.
@@ -184,11 +690,26 @@ class AIAgent:
         # Update context before processing
         self.update_context()
         
-        # Use AI to determine what to do
-        ai_response = self.ai.generate_response(request, self.current_context)
+        # Use AI to determine what to do, reusing a cached response if available
+        with self._ai_lock:
+            context = self._context_for_prompt()
+            ai_response = self.response_cache.get(request, context)
+            if ai_response is None:
+                ai_response = self.ai.generate_response(request, context,
+                                                        static_context=self._static_context)
+                if not ai_response.startswith("Error"):
+                    self.response_cache.put(request, context, ai_response)
+            else:
+                logger.info("Using cached AI response")
+                # Keep the conversation history consistent with what the user saw
+                self.ai.add_to_history("user", request)
+                self.ai.add_to_history("assistant", ai_response)
         
-        # Parse AI response to extract actions
+        # Parse AI response to extract actions, timing it so a slow parser shows up in debug logs
+        parse_start = time.perf_counter()
         actions = self._parse_actions_from_response(ai_response)
+        logger.debug(f"Parsed {len(actions)} actions from {len(ai_response)} characters "
+                     f"in {(time.perf_counter() - parse_start) * 1000:.3f} ms")
         
         # Execute actions
         results = []
@@ -233,12 +754,11 @@ class AIAgent:
                 "text": ai_response
             })
         
-        # Update task history
+        # Update task history; callers receive the full actions and results,
+        # so only a summary is kept here
         self.task_history.append({
             "request": request,
-            "response": ai_response,
-            "actions": actions,
-            "results": results
+            "response_summary": _truncate(ai_response, 200)
         })
         
         return {
@@ -258,72 +778,16 @@ class AIAgent:
         Returns:
             A list of action dictionaries.
         """
-        actions = []
-        
-        # Look for terminal commands in code blocks
-        import re
-        terminal_cmd_pattern = r"```(?:bash|shell|sh)?\s*(.*?)\s*```"
-        terminal_matches = re.findall(terminal_cmd_pattern, response, re.DOTALL)
-        
-        for cmd in terminal_matches:
-            # Skip if it looks like code rather than a command
-            if len(cmd.splitlines()) > 5 or "def " in cmd or "class " in cmd:
-                continue
-                
-            actions.append({
-                "type": "terminal",
-                "command": cmd.strip()
-            })
-        
-        # Look for browser actions in structured format
-        browser_action_pattern = r"BROWSER_ACTION:\s*(\w+)(?:\s+(.+))?"
-        browser_matches = re.findall(browser_action_pattern, response)
-        
-        for action, params_str in browser_matches:
-            params = {}
-            if params_str:
-                # Parse simple key=value pairs
-                for pair in params_str.split():
-                    if "=" in pair:
-                        key, value = pair.split("=", 1)
-                        params[key] = value
-            
-            actions.append({
-                "type": "browser",
-                "action": action.lower(),
-                "params": params
-            })
-        
-        # If no structured actions found, check for common browser action phrases
-        if not actions:
-            if "navigate to" in response.lower() or "go to" in response.lower():
-                url_pattern = r"(?:navigate to|go to)\s+(https?://[^\s]+)"
-                url_match = re.search(url_pattern, response.lower())
-                if url_match:
-                    actions.append({
-                        "type": "browser",
-                        "action": "navigate",
-                        "params": {"url": url_match.group(1)}
-                    })
-        
-        # If we extracted actions, also add the text response
-        if actions:
-            # Remove the code blocks and action commands from the response
-            clean_response = re.sub(terminal_cmd_pattern, "", response)
-            clean_response = re.sub(browser_action_pattern, "", clean_response)
-            clean_response = clean_response.strip()
-            
-            actions.append({
-                "type": "response",
-                "text": clean_response
-            })
-        
-        return actions
+        return parse_actions(response)
     
     def execute_plan(self, goal: str) -> Dict[str, Any]:
         """
         Generate and execute a plan to achieve a goal.
         
+        Steps run in order unless the plan declares dependencies with
+        'depends_on'. In that case each wave of steps whose dependencies
+        have finished runs concurrently.
+        
         Args:
             goal: The goal to achieve.
             
@@ -332,65 +796,19 @@ class AIAgent:
         """
         logger.info(f"Executing plan for goal: {goal}")
         
-        # Generate a plan
-        plan = self.ai.generate_plan(goal)
+        # Reuse a cached plan for the same goal, otherwise generate one
+        plan = self._plan_cache.get(goal)
+        if plan is None:
+            plan = self.ai.generate_plan(goal)
+            if not any(step.get("action") == "Error" for step in plan):
+                self._plan_cache.put(goal, plan)
+        else:
+            logger.info("Using cached plan")
         
-        # Execute each step in the plan
-        results = []
-        for step in plan:
-            step_num = step.get("step", "")
-            action = step.get("action", "")
-            description = step.get("description", "")
-            
-            logger.info(f"Executing plan step {step_num}: {action}")
-            
-            # Process the step based on action type
-            if action.lower() in ["terminal", "command", "shell"]:
-                # Extract command from description if not explicitly provided
-                command = description
-                if ":" in description:
-                    command = description.split(":", 1)[1].strip()
-                
-                result = self.execute_terminal_command(command)
-                results.append({
-                    "step": step_num,
-                    "action": action,
-                    "command": command,
-                    "status": result["status"],
-                    "output": result["stdout"] if result["status"] == 0 else result["stderr"]
-                })
-            
-            elif action.lower() in ["browser", "web", "navigate"]:
-                # Process as a browser action
-                browser_action = "navigate"
-                params = {}
-                
-                # Try to extract URL if it's a navigation action
-                if "http" in description:
-                    import re
-                    url_match = re.search(r"(https?://[^\s]+)", description)
-                    if url_match:
-                        params["url"] = url_match.group(1)
-                
-                result = self.execute_browser_action(browser_action, **params)
-                results.append({
-                    "step": step_num,
-                    "action": action,
-                    "browser_action": browser_action,
-                    "params": params,
-                    "success": result["success"],
-                    "message": result["message"]
-                })
-            
-            else:
-                # Process as a user request
-                process_result = self.process_user_request(description)
-                results.append({
-                    "step": step_num,
-                    "action": action,
-                    "description": description,
-                    "results": process_result["results"]
-                })
+        if any("depends_on" in step for step in plan):
+            results = self._execute_plan_parallel(plan)
+        else:
+            results = [self._execute_plan_step(step) for step in plan]
         
         return {
             "goal": goal,
@@ -398,21 +816,138 @@ class AIAgent:
             "results": results
         }
     
+    def _execute_plan_parallel(self, plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute plan steps in dependency order, running independent steps concurrently.
+        
+        Args:
+            plan: The plan steps, each optionally with a 'depends_on' list of step numbers.
+            
+        Returns:
+            The step results, in plan order.
+        """
+        step_ids = [str(step.get("step", index)) for index, step in enumerate(plan)]
+        known = set(step_ids)
+        pending = {}
+        for index, step in enumerate(plan):
+            depends_on = step.get("depends_on") or []
+            if not isinstance(depends_on, list):
+                depends_on = [depends_on]
+            # Dependencies on steps that are not in the plan are ignored
+            pending[index] = {str(dep) for dep in depends_on if str(dep) in known} - {step_ids[index]}
+        
+        results = [None] * len(plan)
+        done = set()
+        
+        with ThreadPoolExecutor(max_workers=PLAN_MAX_WORKERS) as executor:
+            while pending:
+                ready = [index for index, deps in pending.items() if deps <= done]
+                if not ready:
+                    # Circular dependencies: fall back to running the rest in order
+                    logger.warning("Plan has circular dependencies; running remaining steps serially")
+                    ready = [min(pending)]
+                
+                futures = {index: executor.submit(self._execute_plan_step, plan[index]) for index in ready}
+                for index, future in futures.items():
+                    results[index] = future.result()
+                    done.add(step_ids[index])
+                    del pending[index]
+        
+        return results
+    
+    def _execute_plan_step(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a single plan step.
+        
+        Args:
+            step: The plan step with 'step', 'action' and 'description' keys.
+            
+        Returns:
+            A dictionary with the step result.
+        """
+        step_num = step.get("step", "")
+        action = step.get("action", "")
+        description = step.get("description", "")
+        
+        logger.info(f"Executing plan step {step_num}: {action}")
+        
+        # Process the step based on action type; anything else is a user request
+        handler = self._plan_step_handlers.get(action.lower(), self._plan_request_step)
+        return handler(step_num, action, description)
+    
+    def _plan_terminal_step(self, step_num: str, action: str, description: str) -> Dict[str, Any]:
+        # Extract command from description if not explicitly provided
+        command = description
+        if ":" in description:
+            command = description.split(":", 1)[1].strip()
+        
+        result = self.execute_terminal_command(command)
+        return {
+            "step": step_num,
+            "action": action,
+            "command": command,
+            "status": result["status"],
+            "output": result["stdout"] if result["status"] == 0 else result["stderr"]
+        }
+    
+    def _plan_browser_step(self, step_num: str, action: str, description: str) -> Dict[str, Any]:
+        # Process as a browser action
+        browser_action = "navigate"
+        params = {}
+        
+        # Try to extract URL if it's a navigation action
+        if "http" in description:
+            url_match = _PLAN_URL_RE.search(description)
+            if url_match:
+                params["url"] = url_match.group(1)
+        
+        result = self.execute_browser_action(browser_action, **params)
+        return {
+            "step": step_num,
+            "action": action,
+            "browser_action": browser_action,
+            "params": params,
+            "success": result["success"],
+            "message": result["message"]
+        }
+    
+    def _plan_request_step(self, step_num: str, action: str, description: str) -> Dict[str, Any]:
+        # Process as a user request
+        process_result = self.process_user_request(description)
+        return {
+            "step": step_num,
+            "action": action,
+            "description": description,
+            "results": process_result["results"]
+        }
+    
     def close(self):
         """
-        Close the agent and clean up resources.
+        Close the agent and clean up resources. Safe to call more than once.
         """
+        if getattr(self, "_closed", False):
+            return
+        self._closed = True
+        
         logger.info("Closing AI Agent system")
         
         # Close components
+        if hasattr(self.terminal, 'close'):
+            self.terminal.close()
         if hasattr(self.web, 'close'):
             self.web.close()
         
         logger.info("AI Agent system closed successfully")
     
-    def __del__(self):
+    def __enter__(self):
         """
-        Destructor to ensure resources are cleaned up.
+        Enter a context in which the agent is closed automatically on exit.
+        """
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        """
+        Close the agent when leaving the context.
         """
         self.close()
 
@@ -423,21 +958,27 @@ def main():
     parser.add_argument("--headless", action="store_true", default=True, help="Run browser in headless mode")
     parser.add_argument("--request", help="Process a single request and exit")
     parser.add_argument("--goal", help="Execute a plan to achieve a goal and exit")
+    parser.add_argument("--cache-size", type=int, default=128, help="Maximum number of cached AI responses without actions (0 disables caching)")
+    parser.add_argument("--semantic-cache", action="store_true", help="Reuse cached responses for semantically similar requests")
+    parser.add_argument("--plan-cache-size", type=int, default=64, help="Maximum number of cached plans (0 disables plan caching)")
+    parser.add_argument("--plan-cache-file", help="JSON file used to persist cached plans (e.g. ~/.ai_agent/plans.json)")
+    parser.add_argument("--history-limit", type=int, default=128, help="Maximum number of processed requests kept in the task history")
     args = parser.parse_args()
     
-    # Create the agent
-    agent = AIAgent(api_key=args.api_key, headless=args.headless)
-    
-    try:
+    # Create the agent; it is closed automatically when the block exits
+    with AIAgent(api_key=args.api_key, headless=args.headless,
+                 cache_size=args.cache_size, semantic_cache=args.semantic_cache,
+                 plan_cache_size=args.plan_cache_size, plan_cache_path=args.plan_cache_file,
+                 history_limit=args.history_limit) as agent:
         if args.request:
             # Process a single request
             result = agent.process_user_request(args.request)
-            print(json.dumps(result, indent=2))
+            print(_dumps(result))
         
         elif args.goal:
             # Execute a plan for a goal
             result = agent.execute_plan(args.goal)
-            print(json.dumps(result, indent=2))
+            print(_dumps(result))
         
         else:
             # Interactive mode
@@ -472,10 +1013,6 @@ def main():
                     break
                 except Exception as e:
                     print(f"Error: {str(e)}")
-    
-    finally:
-        # Clean up
-        agent.close()
 
 if __name__ == "__main__":
     main()
@@ -9,10 +9,69 @@ understand context for intelligent automation.
 
 import os
 import json
+import time
+import uuid
+import hashlib
 import logging
-from typing import Dict, List, Optional, Tuple, Union, Any
-import openai
-from dotenv import load_dotenv
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union, Any
+
+# openai and python-dotenv are imported when the first AIDecisionMaker is
+# created, so importing this module stays cheap
+
+# orjson is optional; it is several times faster than json for prompt
+# context and model output. orjson.JSONDecodeError subclasses
+# json.JSONDecodeError, so callers only need to catch the latter.
+try:
+    import orjson
+    
+    def _dumps(obj: Any, sort_keys: bool = False, indent: bool = True) -> str:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option, default=str).decode("utf-8")
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any, sort_keys: bool = False, indent: bool = True) -> str:
+        if indent:
+            return json.dumps(obj, indent=2, sort_keys=sort_keys, ensure_ascii=False, default=str)
+        return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False, default=str)
+    
+    _loads = json.loads
+
+# msgspec is optional; with it the history is saved as MessagePack, which is
+# smaller than JSON and faster to decode
+try:
+    import msgspec
+    
+    class _HistoryMessage(msgspec.Struct):
+        role: str
+        content: str
+    
+    _HISTORY_ERRORS = (OSError, ValueError, msgspec.MsgspecError)
+except ImportError:
+    msgspec = None
+    _HISTORY_ERRORS = (OSError, ValueError)
+
+# tiktoken is optional; without it token counts are estimated from length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Maximum number of generate_command/extract_entities results kept per
+# AIDecisionMaker; repeated requests (e.g. in retry loops) skip the API call
+COMPLETION_CACHE_SIZE = 512
+
+# Per-request timeout in seconds and retry count for the OpenAI clients; the
+# SDK defaults (600 seconds, retried twice) can stall the agent for half an hour
+REQUEST_TIMEOUT = 30.0
+MAX_RETRIES = 2
+
+# Tasks that are mechanical enough to be routed to the smaller model
+_FAST_TASKS = frozenset({"command", "analyze", "extract"})
 
 # Configure logging
 logging.basicConfig(
@@ -21,8 +80,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ai_decision')
 
-# Load environment variables from .env file if it exists
-load_dotenv()
+_env_loaded = False
+
+def _load_env():
+    """Load environment variables from a .env file once, unless SKIP_DOTENV=1."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    if os.getenv("SKIP_DOTENV") == "1":
+        return
+    
+    from dotenv import load_dotenv
+    
+    # Load environment variables from .env file if it exists
+    load_dotenv()
+
+# Number of non-system messages kept when the history is trimmed. The
+# history grows to twice this size before it is trimmed back, so the
+# message prefix sent to the model only changes once every HISTORY_WINDOW
+# messages and the provider's prompt cache keeps matching in between.
+HISTORY_WINDOW = 10
+
+# Approximate token budget for the non-system history. Once it is exceeded,
+# the oldest messages are dropped in one go until the history is back under
+# HISTORY_LOW_WATER_TOKENS, so a single large command output cannot crowd out
+# the rest of the context window and the prefix does not shift every turn.
+MAX_HISTORY_TOKENS = 6000
+HISTORY_LOW_WATER_TOKENS = MAX_HISTORY_TOKENS * 3 // 4
+
+# System messages for the single-shot helpers. They are shared between calls
+# (and must not be modified) so every request starts with the same prefix.
+_SYS_COMMAND = {"role": "system", "content": "You are a helpful assistant that generates precise commands."}
+_SYS_ANALYZE = {"role": "system", "content": "You are a helpful assistant that analyzes command outputs."}
+_SYS_EXTRACT = {"role": "system", "content": "You are a helpful assistant that extracts entities from text."}
+_SYS_PLAN = {"role": "system", "content": "You are a helpful assistant that creates detailed plans."}
 
 class AIDecisionMaker:
     """
@@ -30,23 +122,58 @@ class AIDecisionMaker:
     and context management for the agent.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o",
+                 model_fast: str = "gpt-4o-mini",
+                 model_overrides: Optional[Dict[str, str]] = None,
+                 request_timeout: float = REQUEST_TIMEOUT, max_retries: int = MAX_RETRIES):
         """
         Initialize the AIDecisionMaker.
         
         Args:
             api_key: OpenAI API key. If None, tries to get from environment variable.
-            model: The AI model to use for decision making.
+            model: The AI model to use for decision making (responses and plans).
+            model_fast: A smaller model for mechanical tasks (command generation,
+                        output analysis and entity extraction).
+            model_overrides: Optional per-task models, keyed by task name
+                             (response, command, analyze, extract, plan).
+            request_timeout: Maximum seconds to wait for each API request.
+            max_retries: Number of times a failed API request is retried.
         """
+        import openai
+        
+        _load_env()
+        self._openai = openai
+        
         # Set API key from parameter or environment variable
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        # A single client is reused for every request so its connection pool
+        # (and the TLS sessions in it) stays warm between calls
+        self._client = None
         if not self.api_key:
             logger.warning("No OpenAI API key provided. AI functionality will be limited.")
         else:
-            openai.api_key = self.api_key
+            self._client = openai.OpenAI(api_key=self.api_key, timeout=request_timeout,
+                                         max_retries=max_retries)
         
         self.model = model
-        self.conversation_history = []
+        self.model_fast = model_fast
+        self.model_overrides = dict(model_overrides or {})
+        # AsyncOpenAI client for the async methods, created on first use
+        self._aclient = None
+        # System prompts and the rest of the conversation are kept apart so
+        # appending and trimming never has to scan the whole history
+        self._system_messages: List[Dict[str, str]] = []
+        self._messages: Deque[Dict[str, str]] = deque()
+        # Token counts of self._messages, in the same order, and their total
+        self._message_tokens: Deque[int] = deque()
+        self._history_tokens = 0
+        # Loaded on first use by _count_tokens; False if it could not be loaded
+        self._encoding = None
+        # LRU of raw response texts for generate_command/extract_entities
+        self._completion_cache: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self._completion_cache_lock = threading.Lock()
         self.system_prompt = """
         You are an AI assistant that helps control a computer by generating commands and making decisions.
         You can:
@@ -62,8 +189,82 @@ class AIDecisionMaker:
         
         Always prioritize safety and confirm before potentially destructive operations.
         """
+        # The history always starts with the system prompt
+        self._system_messages.append({"role": "system", "content": self.system_prompt})
+        
+        # System message sent with each request and the (system prompt,
+        # static context) it was built from; see _system_message
+        self._system_msg: Dict[str, str] = {}
+        self._system_message_source: Tuple[Optional[str], Optional[Dict[str, Any]]] = (None, None)
+        
+        logger.info(f"Initialized AIDecisionMaker with model: {model} (fast: {model_fast})")
+    
+    def _model_for(self, task: str) -> str:
+        """
+        Return the model used for a task.
         
-        logger.info(f"Initialized AIDecisionMaker with model: {model}")
+        Args:
+            task: The task name (response, command, analyze, extract, plan).
+            
+        Returns:
+            The override for the task if set, otherwise the fast model for
+            mechanical tasks and the main model for the rest.
+        """
+        if task in self.model_overrides:
+            return self.model_overrides[task]
+        if task in _FAST_TASKS:
+            return self.model_fast
+        return self.model
+    
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """
+        The conversation history as a list, system prompts first.
+        """
+        return self._system_messages + list(self._messages)
+    
+    @conversation_history.setter
+    def conversation_history(self, messages: List[Dict[str, str]]):
+        self._system_messages = []
+        self.reset_history()
+        for msg in messages:
+            self.add_to_history(msg["role"], msg["content"])
+        if not self._system_messages:
+            self._system_messages.append({"role": "system", "content": self.system_prompt})
+    
+    def _count_tokens(self, content: str) -> int:
+        """
+        Count the tokens in a message for the history budget.
+        
+        Uses tiktoken when it is installed, otherwise estimates about four
+        characters per token.
+        
+        Args:
+            content: The message content.
+            
+        Returns:
+            The (approximate) number of tokens.
+        """
+        if self._encoding is None and tiktoken is not None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # The encoding could not be loaded (e.g. offline); estimate from now on
+                logger.warning(f"Could not load tiktoken encoding, estimating token counts: {str(e)}")
+                self._encoding = False
+        if not self._encoding:
+            return len(content) // 4 + 1
+        return len(self._encoding.encode(content, disallowed_special=()))
+    
+    def _drop_oldest_message(self):
+        """
+        Remove the oldest non-system message from the history.
+        """
+        self._messages.popleft()
+        self._history_tokens -= self._message_tokens.popleft()
     
     def add_to_history(self, role: str, content: str):
         """
@@ -73,22 +274,34 @@ class AIDecisionMaker:
             role: The role of the message sender (system, user, assistant).
             content: The message content.
         """
-        self.conversation_history.append({"role": role, "content": content})
+        if role == "system":
+            self._system_messages.append({"role": role, "content": content})
+            return
+        
+        tokens = self._count_tokens(content)
+        self._messages.append({"role": role, "content": content})
+        self._message_tokens.append(tokens)
+        self._history_tokens += tokens
         
         # Keep history at a reasonable size to avoid token limits
-        if len(self.conversation_history) > 20:
-            # Remove oldest messages but keep system prompt
-            system_messages = [msg for msg in self.conversation_history if msg["role"] == "system"]
-            other_messages = [msg for msg in self.conversation_history if msg["role"] != "system"]
-            other_messages = other_messages[-19:]  # Keep last 19 non-system messages
-            self.conversation_history = system_messages + other_messages
+        if len(self._messages) >= 2 * HISTORY_WINDOW:
+            # Remove oldest messages; system prompts are kept separately
+            for _ in range(len(self._messages) - HISTORY_WINDOW):
+                self._drop_oldest_message()
+        
+        # Over the token budget, drop old messages down to the low-water mark,
+        # always keeping the newest one
+        if self._history_tokens > MAX_HISTORY_TOKENS:
+            while self._history_tokens > HISTORY_LOW_WATER_TOKENS and len(self._messages) > 1:
+                self._drop_oldest_message()
     
     def reset_history(self):
         """
         Reset the conversation history, keeping only the system prompt.
         """
-        system_messages = [msg for msg in self.conversation_history if msg["role"] == "system"]
-        self.conversation_history = system_messages
+        self._messages.clear()
+        self._message_tokens.clear()
+        self._history_tokens = 0
         logger.info("Conversation history reset")
     
     def set_system_prompt(self, prompt: str):
@@ -98,65 +311,344 @@ class AIDecisionMaker:
         Args:
             prompt: The new system prompt.
         """
-        # Remove old system prompts
-        self.conversation_history = [msg for msg in self.conversation_history if msg["role"] != "system"]
-        # Add new system prompt
-        self.add_to_history("system", prompt)
+        # Replace old system prompts
+        self._system_messages = [{"role": "system", "content": prompt}]
         self.system_prompt = prompt
         logger.info("System prompt updated")
     
-    def generate_response(self, user_input: str, 
-                         context: Optional[Dict[str, Any]] = None) -> str:
+    def save_history(self, path: str) -> bool:
         """
-        Generate an AI response based on user input and context.
+        Save the conversation history to a file.
+        
+        The history is written as MessagePack when msgspec is installed and
+        as JSON otherwise; load_history reads either format.
         
         Args:
-            user_input: The user's input or request.
-            context: Additional context information (e.g., current directory, browser state).
+            path: The file to write.
             
         Returns:
-            The AI-generated response.
+            True if the history was saved, False otherwise.
         """
-        if not self.api_key:
-            logger.error("Cannot generate response: No OpenAI API key provided")
-            return "Error: AI functionality is not available without an API key."
+        history = self.conversation_history
+        if msgspec is not None:
+            data = msgspec.msgpack.encode(history)
+        else:
+            data = json.dumps(history, ensure_ascii=False).encode("utf-8")
+        
+        try:
+            directory = os.path.dirname(path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a partial history
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".history-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                # Do not leave the temporary file behind
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            logger.info(f"Saved {len(history)} history messages to {path}")
+            return True
+        except OSError as e:
+            logger.error(f"Error saving history to {path}: {str(e)}")
+            return False
+    
+    def load_history(self, path: str) -> bool:
+        """
+        Replace the conversation history with one saved by save_history.
         
+        Args:
+            path: The file to read.
+            
+        Returns:
+            True if the history was loaded, False otherwise.
+        """
         try:
-            # Add context to user input if provided
-            if context:
-                context_str = "\n\nCurrent context:\n" + json.dumps(context, indent=2)
-                enhanced_input = user_input + context_str
+            with open(path, "rb") as f:
+                data = f.read()
+            
+            # JSON histories start with '['; anything else is MessagePack
+            if data.lstrip()[:1] == b"[":
+                history = json.loads(data)
+            elif msgspec is not None:
+                history = [{"role": msg.role, "content": msg.content}
+                           for msg in msgspec.msgpack.decode(data, type=List[_HistoryMessage])]
             else:
-                enhanced_input = user_input
+                raise ValueError("msgspec is required to read MessagePack histories")
+        except _HISTORY_ERRORS as e:
+            logger.error(f"Error loading history from {path}: {str(e)}")
+            return False
+        
+        self.conversation_history = history
+        # Keep the prompt used for requests in sync with the loaded history
+        self.system_prompt = self._system_messages[0]["content"]
+        logger.info(f"Loaded {len(history)} history messages from {path}")
+        return True
+    
+    def _system_message(self, static_context: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        Return the system message for a request, reusing the previous one
+        while the system prompt and static context object are unchanged.
+        
+        The static context is expected not to be mutated once it has been
+        passed in; pass a new dict to change it.
+        
+        Args:
+            static_context: Stable context to append to the system prompt.
             
-            # Add user input to history
-            self.add_to_history("user", enhanced_input)
+        Returns:
+            The system message dictionary.
+        """
+        prompt, cached_context = self._system_message_source
+        if prompt != self.system_prompt or cached_context is not static_context:
+            system_content = self.system_prompt
+            if static_context:
+                system_content += "\n\nAgent capabilities:\n" + _dumps(static_context, sort_keys=True)
+            self._system_msg = {"role": "system", "content": system_content}
+            self._system_message_source = (self.system_prompt, static_context)
+        return self._system_msg
+    
+    def _build_messages(self, context: Optional[Dict[str, Any]] = None,
+                        static_context: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """
+        Build the message list for a chat completion from the history.
+        
+        Args:
+            context: Volatile context to insert just before the latest user message.
+            static_context: Stable context to append to the system prompt.
             
-            # Ensure system prompt is in history
-            if not any(msg["role"] == "system" for msg in self.conversation_history):
-                self.conversation_history.insert(0, {"role": "system", "content": self.system_prompt})
+        Returns:
+            The list of messages to send to the model.
+        """
+        # The first system message is the prompt, sent in its cached form; any
+        # further ones added with add_to_history or load_history follow it
+        messages = [self._system_message(static_context)]
+        messages.extend(self._system_messages[1:])
+        messages.extend(self._messages)
+        
+        if context:
+            # Compact JSON: indentation only costs tokens on every turn
+            context_message = {"role": "system", "content": "Current context:\n" + _dumps(context, indent=False)}
+            messages.insert(len(messages) - 1, context_message)
+        
+        return messages
+    
+    def _response_request(self, user_input: str,
+                          context: Optional[Dict[str, Any]] = None,
+                          static_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Add the user input to history and build the chat completion parameters.
+        
+        Args:
+            user_input: The user's input or request.
+            context: Volatile context information (e.g., current directory, browser state).
+            static_context: Context that does not change between requests.
             
-            # Generate response from OpenAI
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=self.conversation_history,
-                temperature=0.7,
-                max_tokens=1000
-            )
+        Returns:
+            Keyword arguments for chat.completions.create.
+        """
+        # Add user input to history
+        self.add_to_history("user", user_input)
+        
+        return {
+            "model": self._model_for("response"),
+            "messages": self._build_messages(context, static_context),
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
+    
+    def _stream_response(self, user_input: str,
+                         context: Optional[Dict[str, Any]] = None,
+                         static_context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Request a streamed chat completion and yield its content as it arrives.
+        
+        The user input and, once the stream is exhausted, the full response
+        are added to the conversation history. Errors are raised to the caller.
+        
+        Args:
+            user_input: The user's input or request.
+            context: Volatile context information (e.g., current directory, browser state).
+            static_context: Context that does not change between requests.
             
-            # Extract and process response
-            response_text = response.choices[0].message.content
+        Yields:
+            Pieces of the AI-generated response.
+        """
+        # Stream response from OpenAI
+        response = self._client.chat.completions.create(
+            **self._response_request(user_input, context, static_context),
+            stream=True
+        )
+        
+        parts = []
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+                yield content
+        
+        # Add response to history
+        self.add_to_history("assistant", "".join(parts))
+        
+        logger.info("Generated AI response successfully")
+    
+    def generate_response_stream(self, user_input: str,
+                                 context: Optional[Dict[str, Any]] = None,
+                                 static_context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Generate an AI response, yielding it piece by piece as it is decoded.
+        
+        Args:
+            user_input: The user's input or request.
+            context: Volatile context information (e.g., current directory, browser state).
+            static_context: Context that does not change between requests.
             
-            # Add response to history
-            self.add_to_history("assistant", response_text)
+        Yields:
+            Pieces of the AI-generated response, or a single error message.
+        """
+        if not self.api_key:
+            logger.error("Cannot generate response: No OpenAI API key provided")
+            yield "Error: AI functionality is not available without an API key."
+            return
+        
+        try:
+            yield from self._stream_response(user_input, context, static_context)
+        except Exception as e:
+            logger.error(f"Error generating AI response: {str(e)}")
+            yield f"Error generating response: {str(e)}"
+    
+    def generate_response(self, user_input: str, 
+                         context: Optional[Dict[str, Any]] = None,
+                         static_context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate an AI response based on user input and context.
+        
+        The request is sent as [system prompt + static context][history]
+        [current context][user input] so that everything before the current
+        context stays identical between turns and can be served from the
+        provider's prompt cache. The current context is not stored in history.
+        The response is streamed and collected; use generate_response_stream
+        to consume it incrementally.
+        
+        Args:
+            user_input: The user's input or request.
+            context: Volatile context information (e.g., current directory, browser state).
+            static_context: Context that does not change between requests
+                            (e.g., agent capabilities and action formats).
             
-            logger.info("Generated AI response successfully")
-            return response_text
+        Returns:
+            The AI-generated response.
+        """
+        if not self.api_key:
+            logger.error("Cannot generate response: No OpenAI API key provided")
+            return "Error: AI functionality is not available without an API key."
+        
+        try:
+            return "".join(self._stream_response(user_input, context, static_context))
             
         except Exception as e:
             logger.error(f"Error generating AI response: {str(e)}")
             return f"Error generating response: {str(e)}"
     
+    def generate_embedding(self, text: str,
+                           model: str = "text-embedding-3-small") -> Optional[List[float]]:
+        """
+        Generate an embedding vector for a piece of text.
+        
+        Args:
+            text: The text to embed.
+            model: The embedding model to use.
+        
+        Returns:
+            The embedding as a list of floats, or None if unavailable.
+        """
+        if not self.api_key:
+            logger.error("Cannot generate embedding: No OpenAI API key provided")
+            return None
+        
+        try:
+            response = self._client.embeddings.create(model=model, input=text)
+            return response.data[0].embedding
+        except Exception as e:
+            logger.error(f"Error generating embedding: {str(e)}")
+            return None
+
+    def _cached_completion(self, key: Tuple[Any, ...]) -> Optional[str]:
+        """
+        Return a cached response text, marking it as recently used.
+        
+        Args:
+            key: The cache key for the request.
+            
+        Returns:
+            The cached response text, or None if not cached.
+        """
+        with self._completion_cache_lock:
+            text = self._completion_cache.get(key)
+            if text is not None:
+                self._completion_cache.move_to_end(key)
+            return text
+    
+    def _cache_completion(self, key: Tuple[Any, ...], text: str):
+        """
+        Cache a response text, evicting the least recently used entries.
+        
+        Args:
+            key: The cache key for the request.
+            text: The response text.
+        """
+        with self._completion_cache_lock:
+            self._completion_cache[key] = text
+            self._completion_cache.move_to_end(key)
+            while len(self._completion_cache) > COMPLETION_CACHE_SIZE:
+                self._completion_cache.popitem(last=False)
+    
+    def _command_key(self, task_description: str, command_type: str) -> Tuple[Any, ...]:
+        """Return the completion cache key for a command generation."""
+        return ("command", self._model_for("command"), command_type, task_description)
+    
+    def _entities_key(self, text: str, entity_types: List[str]) -> Tuple[Any, ...]:
+        """Return the completion cache key for an entity extraction."""
+        # Hash the text so large inputs do not stay alive as cache keys
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        return ("extract", self._model_for("extract"), digest, tuple(sorted(entity_types)))
+    
+    def _command_request(self, task_description: str,
+                         command_type: str = "terminal") -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for command generation.
+        
+        Args:
+            task_description: Description of the task to accomplish.
+            command_type: Type of command to generate (terminal, browser, etc.).
+            
+        Returns:
+            Keyword arguments for chat.completions.create.
+        """
+        # Create a specialized prompt for command generation
+        if command_type == "terminal":
+            prompt = f"Generate a Linux terminal command to accomplish this task: {task_description}\nProvide only the command with no explanation."
+        elif command_type == "browser":
+            prompt = f"Generate a step-by-step instruction for browser interaction to accomplish this task: {task_description}\nFormat as numbered steps."
+        else:
+            prompt = f"Generate a {command_type} command to accomplish this task: {task_description}\nProvide only the command with no explanation."
+        
+        return {
+            "model": self._model_for("command"),
+            "messages": [
+                _SYS_COMMAND,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 500
+        }
+    
     def generate_command(self, task_description: str, 
                         command_type: str = "terminal") -> str:
         """
@@ -174,27 +666,18 @@ class AIDecisionMaker:
             return "Error: AI functionality is not available without an API key."
         
         try:
-            # Create a specialized prompt for command generation
-            if command_type == "terminal":
-                prompt = f"Generate a Linux terminal command to accomplish this task: {task_description}\nProvide only the command with no explanation."
-            elif command_type == "browser":
-                prompt = f"Generate a step-by-step instruction for browser interaction to accomplish this task: {task_description}\nFormat as numbered steps."
-            else:
-                prompt = f"Generate a {command_type} command to accomplish this task: {task_description}\nProvide only the command with no explanation."
+            key = self._command_key(task_description, command_type)
+            command = self._cached_completion(key)
+            if command is not None:
+                logger.info(f"Using cached {command_type} command")
+                return command
             
             # Generate response without adding to conversation history
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that generates precise commands."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
+            response = self._client.chat.completions.create(**self._command_request(task_description, command_type))
             
             # Extract and process command
             command = response.choices[0].message.content.strip()
+            self._cache_completion(key, command)
             
             logger.info(f"Generated {command_type} command successfully")
             return command
@@ -203,6 +686,52 @@ class AIDecisionMaker:
             logger.error(f"Error generating command: {str(e)}")
             return f"Error generating command: {str(e)}"
     
+    def _analysis_request(self, command: str, output: str) -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for an output analysis.
+        
+        Args:
+            command: The command that was executed.
+            output: The output of the command.
+            
+        Returns:
+            Keyword arguments for chat.completions.create.
+        """
+        # Create a specialized prompt for output analysis
+        prompt = f"Analyze the following command output and extract key information:\n\nCommand: {command}\n\nOutput:\n{output}\n\nRespond with a JSON object with keys: success (boolean), key_findings (list), next_steps (list)."
+        
+        return {
+            "model": self._model_for("analyze"),
+            "messages": [
+                _SYS_ANALYZE,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 1000,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _parse_analysis(self, analysis_text: str) -> Dict[str, Any]:
+        """
+        Parse the model's output analysis into a dictionary.
+        
+        Args:
+            analysis_text: The raw response text.
+            
+        Returns:
+            A dictionary with analysis results.
+        """
+        # Try to parse as JSON
+        try:
+            return _loads(analysis_text)
+        except json.JSONDecodeError:
+            # If not valid JSON, return as text
+            return {
+                "success": None,
+                "key_findings": [analysis_text],
+                "next_steps": []
+            }
+    
     def analyze_output(self, command: str, output: str) -> Dict[str, Any]:
         """
         Analyze command output to extract useful information.
@@ -219,50 +748,72 @@ class AIDecisionMaker:
             return {"error": "AI functionality is not available without an API key."}
         
         try:
-            # Create a specialized prompt for output analysis
-            prompt = f"Analyze the following command output and extract key information:\n\nCommand: {command}\n\nOutput:\n{output}\n\nProvide analysis as JSON with keys: success (boolean), key_findings (list), next_steps (list)."
-            
             # Generate response without adding to conversation history
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that analyzes command outputs."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000
-            )
+            response = self._client.chat.completions.create(**self._analysis_request(command, output))
             
             # Extract and process analysis
-            analysis_text = response.choices[0].message.content.strip()
-            
-            # Try to parse as JSON
-            try:
-                # Extract JSON if it's wrapped in markdown code blocks
-                if "```json" in analysis_text:
-                    json_str = analysis_text.split("```json")[1].split("```")[0].strip()
-                    analysis = json.loads(json_str)
-                else:
-                    analysis = json.loads(analysis_text)
-            except json.JSONDecodeError:
-                # If not valid JSON, return as text
-                analysis = {
-                    "success": None,
-                    "key_findings": [analysis_text],
-                    "next_steps": []
-                }
+            analysis = self._parse_analysis(response.choices[0].message.content.strip())
             
             logger.info("Analyzed command output successfully")
             return analysis
             
         except Exception as e:
             logger.error(f"Error analyzing output: {str(e)}")
-            return {
-                "success": False,
-                "error": str(e),
-                "key_findings": [],
-                "next_steps": []
-            }
+            return self._analysis_error(str(e))
+    
+    @staticmethod
+    def _analysis_error(error: str) -> Dict[str, Any]:
+        """Return the analysis result used when a request fails."""
+        return {
+            "success": False,
+            "error": error,
+            "key_findings": [],
+            "next_steps": []
+        }
+    
+    def _entities_request(self, text: str, entity_types: List[str]) -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for an entity extraction.
+        
+        Args:
+            text: The text to analyze.
+            entity_types: Types of entities to extract.
+            
+        Returns:
+            Keyword arguments for chat.completions.create.
+        """
+        # Create a specialized prompt for entity extraction
+        entity_types_str = ", ".join(entity_types)
+        prompt = f"Extract the following entity types from the text: {entity_types_str}\n\nText:\n{text}\n\nRespond with a JSON object with entity types as keys and lists of extracted entities as values."
+        
+        return {
+            "model": self._model_for("extract"),
+            "messages": [
+                _SYS_EXTRACT,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 1000,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _parse_entities(self, entities_text: str, entity_types: List[str]) -> Dict[str, List[str]]:
+        """
+        Parse the model's entity extraction into a dictionary.
+        
+        Args:
+            entities_text: The raw response text.
+            entity_types: Types of entities that were requested.
+            
+        Returns:
+            A dictionary with entity types as keys and lists of extracted entities as values.
+        """
+        # Try to parse as JSON
+        try:
+            return _loads(entities_text)
+        except json.JSONDecodeError:
+            # If not valid JSON, return empty lists
+            return {entity_type: [] for entity_type in entity_types}
     
     def extract_entities(self, text: str, entity_types: List[str]) -> Dict[str, List[str]]:
         """
@@ -280,43 +831,144 @@ class AIDecisionMaker:
             return {entity_type: [] for entity_type in entity_types}
         
         try:
-            # Create a specialized prompt for entity extraction
-            entity_types_str = ", ".join(entity_types)
-            prompt = f"Extract the following entity types from the text: {entity_types_str}\n\nText:\n{text}\n\nProvide results as JSON with entity types as keys and lists of extracted entities as values."
-            
-            # Generate response without adding to conversation history
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts entities from text."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000
-            )
+            key = self._entities_key(text, entity_types)
+            entities_text = self._cached_completion(key)
+            if entities_text is None:
+                # Generate response without adding to conversation history
+                response = self._client.chat.completions.create(**self._entities_request(text, entity_types))
+                entities_text = response.choices[0].message.content.strip()
+                self._cache_completion(key, entities_text)
             
             # Extract and process entities
-            entities_text = response.choices[0].message.content.strip()
+            entities = self._parse_entities(entities_text, entity_types)
             
-            # Try to parse as JSON
-            try:
-                # Extract JSON if it's wrapped in markdown code blocks
-                if "```json" in entities_text:
-                    json_str = entities_text.split("```json")[1].split("```")[0].strip()
-                    entities = json.loads(json_str)
-                else:
-                    entities = json.loads(entities_text)
-            except json.JSONDecodeError:
-                # If not valid JSON, return empty lists
-                entities = {entity_type: [] for entity_type in entity_types}
-            
-            logger.info(f"Extracted entities successfully: {entity_types_str}")
+            logger.info(f"Extracted entities successfully: {', '.join(entity_types)}")
             return entities
             
         except Exception as e:
             logger.error(f"Error extracting entities: {str(e)}")
             return {entity_type: [] for entity_type in entity_types}
     
+    def _entities_bulk_request(self, texts: List[str], entity_types: List[str]) -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for a multi-document entity extraction.
+        
+        Args:
+            texts: The documents to analyze.
+            entity_types: Types of entities to extract.
+            
+        Returns:
+            Keyword arguments for chat.completions.create.
+        """
+        entity_types_str = ", ".join(entity_types)
+        documents = "\n\n".join(f"[DOC {i}]\n{text}" for i, text in enumerate(texts))
+        prompt = f"For each numbered document below, extract the following entity types: {entity_types_str}\n\n{documents}\n\nRespond with a JSON object with a 'results' list where element i corresponds to document i and maps entity types to lists of extracted entities."
+        
+        return {
+            "model": self._model_for("extract"),
+            "messages": [
+                _SYS_EXTRACT,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            # Allow roughly as much output per document as a single extraction
+            "max_tokens": min(1000 * len(texts), 16000),
+            "response_format": {"type": "json_object"}
+        }
+    
+    def extract_entities_bulk(self, texts: List[str], entity_types: List[str]) -> List[Dict[str, List[str]]]:
+        """
+        Extract entities from several texts with a single request.
+        
+        Sharing one request spreads the prompt overhead over all documents;
+        use it for batches of short texts rather than large ones.
+        
+        Args:
+            texts: The texts to analyze.
+            entity_types: Types of entities to extract (e.g., urls, emails, dates).
+            
+        Returns:
+            One dictionary per text, in order, with entity types as keys and
+            lists of extracted entities as values.
+        """
+        extracted = [{entity_type: [] for entity_type in entity_types} for _ in texts]
+        if not texts:
+            return []
+        if not self.api_key:
+            logger.error("Cannot extract entities: No OpenAI API key provided")
+            return extracted
+        
+        try:
+            # Generate response without adding to conversation history
+            response = self._client.chat.completions.create(**self._entities_bulk_request(texts, entity_types))
+            entities_text = response.choices[0].message.content.strip()
+            
+            try:
+                parsed = _loads(entities_text).get("results", [])
+            except (json.JSONDecodeError, AttributeError):
+                parsed = []
+            
+            # Keep one entry per input text even if the model returned fewer
+            for i, entities in enumerate(parsed[:len(texts)]):
+                if isinstance(entities, dict):
+                    extracted[i] = entities
+            
+            logger.info(f"Extracted entities from {len(texts)} texts: {', '.join(entity_types)}")
+            return extracted
+            
+        except Exception as e:
+            logger.error(f"Error extracting entities: {str(e)}")
+            return extracted
+    
+    def _plan_request(self, goal: str) -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for plan generation.
+        
+        Args:
+            goal: The goal to achieve.
+            
+        Returns:
+            Keyword arguments for chat.completions.create.
+        """
+        # Create a specialized prompt for plan generation
+        prompt = f"Generate a detailed step-by-step plan to achieve this goal: {goal}\n\nRespond with a JSON object with a 'steps' list, each step with 'step' (number), 'action' (command or action type), and 'description' (explanation) keys. Optionally add 'depends_on' (list of step numbers that must finish first) so independent steps can run in parallel."
+        
+        return {
+            "model": self._model_for("plan"),
+            "messages": [
+                _SYS_PLAN,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 1500,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _parse_plan(self, plan_text: str) -> List[Dict[str, str]]:
+        """
+        Parse the model's plan into a list of steps.
+        
+        Args:
+            plan_text: The raw response text.
+            
+        Returns:
+            A list of steps, each as a dictionary with 'step', 'action', and 'description' keys.
+        """
+        # Try to parse as JSON
+        try:
+            plan_data = _loads(plan_text)
+            
+            # Ensure the plan is in the expected format
+            if isinstance(plan_data, dict) and "steps" in plan_data:
+                return plan_data["steps"]
+            elif isinstance(plan_data, list):
+                return plan_data
+            else:
+                return [{"step": "1", "action": "Error", "description": "Invalid plan format returned."}]
+        except json.JSONDecodeError:
+            # If not valid JSON, create a simple plan with the text
+            return [{"step": "1", "action": "Manual", "description": plan_text}]
+    
     def generate_plan(self, goal: str) -> List[Dict[str, str]]:
         """
         Generate a step-by-step plan to achieve a goal.
@@ -332,42 +984,11 @@ class AIDecisionMaker:
             return [{"step": "1", "action": "Error", "description": "AI functionality is not available without an API key."}]
         
         try:
-            # Create a specialized prompt for plan generation
-            prompt = f"Generate a detailed step-by-step plan to achieve this goal: {goal}\n\nProvide the plan as JSON with a list of steps, each with 'step' (number), 'action' (command or action type), and 'description' (explanation) keys."
-            
             # Generate response without adding to conversation history
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates detailed plans."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1500
-            )
+            response = self._client.chat.completions.create(**self._plan_request(goal))
             
             # Extract and process plan
-            plan_text = response.choices[0].message.content.strip()
-            
-            # Try to parse as JSON
-            try:
-                # Extract JSON if it's wrapped in markdown code blocks
-                if "```json" in plan_text:
-                    json_str = plan_text.split("```json")[1].split("```")[0].strip()
-                    plan_data = json.loads(json_str)
-                else:
-                    plan_data = json.loads(plan_text)
-                
-                # Ensure the plan is in the expected format
-                if isinstance(plan_data, dict) and "steps" in plan_data:
-                    plan = plan_data["steps"]
-                elif isinstance(plan_data, list):
-                    plan = plan_data
-                else:
-                    plan = [{"step": "1", "action": "Error", "description": "Invalid plan format returned."}]
-            except json.JSONDecodeError:
-                # If not valid JSON, create a simple plan with the text
-                plan = [{"step": "1", "action": "Manual", "description": plan_text}]
+            plan = self._parse_plan(response.choices[0].message.content.strip())
             
             logger.info(f"Generated plan successfully for goal: {goal}")
             return plan
@@ -375,6 +996,342 @@ class AIDecisionMaker:
         except Exception as e:
             logger.error(f"Error generating plan: {str(e)}")
             return [{"step": "1", "action": "Error", "description": f"Error generating plan: {str(e)}"}]
+    
+    def _get_async_client(self) -> "openai.AsyncOpenAI":
+        """
+        Return the shared AsyncOpenAI client, creating it on first use.
+        
+        All async methods share the client, and with it one HTTP connection
+        pool, so concurrent requests reuse open connections.
+        """
+        if self._aclient is None:
+            self._aclient = self._openai.AsyncOpenAI(api_key=self.api_key, timeout=self.request_timeout,
+                                                     max_retries=self.max_retries)
+        return self._aclient
+    
+    async def _acomplete(self, request: Dict[str, Any]) -> str:
+        """
+        Send a chat completion request through the async client.
+        
+        Args:
+            request: Keyword arguments for chat.completions.create.
+            
+        Returns:
+            The stripped response text.
+        """
+        response = await self._get_async_client().chat.completions.create(**request)
+        return response.choices[0].message.content.strip()
+    
+    async def agenerate_response(self, user_input: str,
+                                 context: Optional[Dict[str, Any]] = None,
+                                 static_context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Async version of generate_response.
+        
+        The other async methods do not touch the conversation history and can
+        be awaited concurrently with asyncio.gather; concurrent calls to this
+        method would interleave the history and should be avoided.
+        
+        Args:
+            user_input: The user's input or request.
+            context: Volatile context information (e.g., current directory, browser state).
+            static_context: Context that does not change between requests.
+            
+        Returns:
+            The AI-generated response.
+        """
+        if not self.api_key:
+            logger.error("Cannot generate response: No OpenAI API key provided")
+            return "Error: AI functionality is not available without an API key."
+        
+        try:
+            request = self._response_request(user_input, context, static_context)
+            response = await self._get_async_client().chat.completions.create(**request)
+            response_text = response.choices[0].message.content
+            
+            # Add response to history
+            self.add_to_history("assistant", response_text)
+            
+            logger.info("Generated AI response successfully")
+            return response_text
+            
+        except Exception as e:
+            logger.error(f"Error generating AI response: {str(e)}")
+            return f"Error generating response: {str(e)}"
+    
+    async def agenerate_command(self, task_description: str,
+                                command_type: str = "terminal") -> str:
+        """
+        Async version of generate_command.
+        
+        Args:
+            task_description: Description of the task to accomplish.
+            command_type: Type of command to generate (terminal, browser, etc.).
+            
+        Returns:
+            The generated command.
+        """
+        if not self.api_key:
+            logger.error("Cannot generate command: No OpenAI API key provided")
+            return "Error: AI functionality is not available without an API key."
+        
+        try:
+            key = self._command_key(task_description, command_type)
+            command = self._cached_completion(key)
+            if command is None:
+                command = await self._acomplete(self._command_request(task_description, command_type))
+                self._cache_completion(key, command)
+            logger.info(f"Generated {command_type} command successfully")
+            return command
+        except Exception as e:
+            logger.error(f"Error generating command: {str(e)}")
+            return f"Error generating command: {str(e)}"
+    
+    async def aanalyze_output(self, command: str, output: str) -> Dict[str, Any]:
+        """
+        Async version of analyze_output.
+        
+        Args:
+            command: The command that was executed.
+            output: The output of the command.
+            
+        Returns:
+            A dictionary with analysis results.
+        """
+        if not self.api_key:
+            logger.error("Cannot analyze output: No OpenAI API key provided")
+            return {"error": "AI functionality is not available without an API key."}
+        
+        try:
+            analysis = self._parse_analysis(await self._acomplete(self._analysis_request(command, output)))
+            logger.info("Analyzed command output successfully")
+            return analysis
+        except Exception as e:
+            logger.error(f"Error analyzing output: {str(e)}")
+            return self._analysis_error(str(e))
+    
+    async def aextract_entities(self, text: str, entity_types: List[str]) -> Dict[str, List[str]]:
+        """
+        Async version of extract_entities.
+        
+        Args:
+            text: The text to analyze.
+            entity_types: Types of entities to extract (e.g., urls, emails, dates).
+            
+        Returns:
+            A dictionary with entity types as keys and lists of extracted entities as values.
+        """
+        if not self.api_key:
+            logger.error("Cannot extract entities: No OpenAI API key provided")
+            return {entity_type: [] for entity_type in entity_types}
+        
+        try:
+            key = self._entities_key(text, entity_types)
+            entities_text = self._cached_completion(key)
+            if entities_text is None:
+                entities_text = await self._acomplete(self._entities_request(text, entity_types))
+                self._cache_completion(key, entities_text)
+            entities = self._parse_entities(entities_text, entity_types)
+            logger.info(f"Extracted entities successfully: {', '.join(entity_types)}")
+            return entities
+        except Exception as e:
+            logger.error(f"Error extracting entities: {str(e)}")
+            return {entity_type: [] for entity_type in entity_types}
+    
+    async def agenerate_plan(self, goal: str) -> List[Dict[str, str]]:
+        """
+        Async version of generate_plan.
+        
+        Args:
+            goal: The goal to achieve.
+            
+        Returns:
+            A list of steps, each as a dictionary with 'step', 'action', and 'description' keys.
+        """
+        if not self.api_key:
+            logger.error("Cannot generate plan: No OpenAI API key provided")
+            return [{"step": "1", "action": "Error", "description": "AI functionality is not available without an API key."}]
+        
+        try:
+            plan = self._parse_plan(await self._acomplete(self._plan_request(goal)))
+            logger.info(f"Generated plan successfully for goal: {goal}")
+            return plan
+        except Exception as e:
+            logger.error(f"Error generating plan: {str(e)}")
+            return [{"step": "1", "action": "Error", "description": f"Error generating plan: {str(e)}"}]
+
+class BatchedAIDecisionMaker(AIDecisionMaker):
+    """
+    An AIDecisionMaker that can queue independent requests and submit them
+    together through the OpenAI Batch API.
+    
+    Batch requests cost less and are not subject to the interactive rate
+    limits, but complete asynchronously (within 24 hours). They suit bulk,
+    non-interactive work such as analyzing many command outputs; interactive
+    callers should keep using the synchronous methods.
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o",
+                 model_fast: str = "gpt-4o-mini",
+                 model_overrides: Optional[Dict[str, str]] = None,
+                 request_timeout: float = REQUEST_TIMEOUT, max_retries: int = MAX_RETRIES,
+                 poll_interval: float = 30.0):
+        """
+        Initialize the BatchedAIDecisionMaker.
+        
+        Args:
+            api_key: OpenAI API key. If None, tries to get from environment variable.
+            model: The AI model to use for decision making (responses and plans).
+            model_fast: A smaller model for mechanical tasks.
+            model_overrides: Optional per-task models, keyed by task name.
+            request_timeout: Maximum seconds to wait for each API request.
+            max_retries: Number of times a failed API request is retried.
+            poll_interval: Seconds to wait between batch status checks in flush().
+        """
+        super().__init__(api_key=api_key, model=model, model_fast=model_fast,
+                         model_overrides=model_overrides, request_timeout=request_timeout,
+                         max_retries=max_retries)
+        self.poll_interval = poll_interval
+        # custom_id -> (request body, future, result parser, error result builder)
+        self._queued: Dict[str, Tuple[Dict[str, Any], Future, Callable[[str], Any], Callable[[str], Any]]] = {}
+    
+    def _enqueue(self, body: Dict[str, Any], parse: Callable[[str], Any],
+                 on_error: Callable[[str], Any]) -> Future:
+        """
+        Queue a chat completion request for the next flush().
+        
+        Args:
+            body: Keyword arguments for chat.completions.create.
+            parse: Converts the response text into the result.
+            on_error: Builds the result for a failed request from an error message.
+            
+        Returns:
+            A future resolved with the result when the batch completes.
+        """
+        future = Future()
+        custom_id = f"request-{uuid.uuid4().hex}"
+        self._queued[custom_id] = (body, future, parse, on_error)
+        return future
+    
+    def queue_analyze_output(self, command: str, output: str) -> Future:
+        """
+        Queue an output analysis for the next batch.
+        
+        Args:
+            command: The command that was executed.
+            output: The output of the command.
+            
+        Returns:
+            A future resolved with the same dictionary analyze_output returns.
+        """
+        if not self.api_key:
+            future = Future()
+            future.set_result(self.analyze_output(command, output))
+            return future
+        
+        return self._enqueue(self._analysis_request(command, output),
+                             self._parse_analysis, self._analysis_error)
+    
+    def queue_extract_entities(self, text: str, entity_types: List[str]) -> Future:
+        """
+        Queue an entity extraction for the next batch.
+        
+        Args:
+            text: The text to analyze.
+            entity_types: Types of entities to extract (e.g., urls, emails, dates).
+            
+        Returns:
+            A future resolved with the same dictionary extract_entities returns.
+        """
+        if not self.api_key:
+            future = Future()
+            future.set_result(self.extract_entities(text, entity_types))
+            return future
+        
+        return self._enqueue(self._entities_request(text, entity_types),
+                             lambda entities_text: self._parse_entities(entities_text, entity_types),
+                             lambda error: {entity_type: [] for entity_type in entity_types})
+    
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """
+        Submit all queued requests as one batch and wait for the results.
+        
+        Every queued future is resolved: with the parsed result on success,
+        or with the method's usual error result if the request or the batch
+        failed.
+        
+        Args:
+            timeout: Maximum seconds to wait for the batch; it is cancelled
+                     when exceeded. None waits until the batch finishes.
+            
+        Returns:
+            The number of requests that completed successfully.
+        """
+        if not self._queued:
+            return 0
+        
+        queued, self._queued = self._queued, {}
+        completed = 0
+        
+        try:
+            # Upload the requests as a JSONL file and start the batch
+            lines = [
+                json.dumps({"custom_id": custom_id, "method": "POST",
+                            "url": "/v1/chat/completions", "body": body})
+                for custom_id, (body, _, _, _) in queued.items()
+            ]
+            batch_file = self._client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self._client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(queued)} requests")
+            
+            # Wait for the batch to finish
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._client.batches.cancel(batch.id)
+                    raise TimeoutError(f"Batch {batch.id} did not finish within {timeout} seconds")
+                time.sleep(self.poll_interval)
+                batch = self._client.batches.retrieve(batch.id)
+            
+            # Resolve futures from the output file
+            if batch.output_file_id:
+                output = self._client.files.content(batch.output_file_id).text
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    result = _loads(line)
+                    entry = queued.pop(result.get("custom_id"), None)
+                    if entry is None:
+                        continue
+                    _, future, parse, on_error = entry
+                    response = result.get("response") or {}
+                    if response.get("status_code") == 200:
+                        content = response["body"]["choices"][0]["message"]["content"].strip()
+                        future.set_result(parse(content))
+                        completed += 1
+                    else:
+                        error = result.get("error") or response.get("body", {}).get("error")
+                        future.set_result(on_error(f"Batch request failed: {error}"))
+            
+            logger.info(f"Batch {batch.id} finished with status {batch.status}: {completed} succeeded")
+            error_message = f"No result returned by batch {batch.id} (status: {batch.status})"
+            
+        except Exception as e:
+            logger.error(f"Error processing batch: {str(e)}")
+            error_message = str(e)
+        
+        # Anything left without a result did not come back from the batch
+        for _, future, _, on_error in queued.values():
+            future.set_result(on_error(error_message))
+        
+        return completed
 
 # Example usage
 if __name__ == "__main__":
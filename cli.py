@@ -7,78 +7,150 @@ for interacting with the AI Agent system.
 """
 
 import os
+import re
 import sys
 import argparse
 import logging
+import logging.handlers
 import json
-import readline
 import signal
+import socket
+import threading
 import time
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any
 
 # Add the current directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import the AI Agent
-from ai_agent import AIAgent
+# The AI Agent is imported in AIAgentCLI.initialize_agent so that --help and
+# argument errors do not pay for loading it
 
-# Configure logging
+# Configure logging. The log file is only created on the first record and
+# records are written in batches; errors and logging shutdown flush them.
+_file_handler = logging.FileHandler("ai_agent.log", delay=True)
+_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler("ai_agent.log"),
+        logging.handlers.MemoryHandler(100, flushLevel=logging.ERROR, target=_file_handler),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger('ai_agent_cli')
 
+# A CLI command word, optionally followed by its argument
+_COMMAND_RE = re.compile(
+    r"(?P<verb>help|status|history|exit|quit|execute|browse|plan)(?:\s+(?P<arg>.*))?",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Number of lines kept in the interactive line-editing history and in the
+# CLI's own command history
+HISTORY_LENGTH = 1000
+
 class AIAgentCLI:
     """
     Command-line interface for the AI Agent system.
     """
     
-    def __init__(self, api_key: Optional[str] = None, headless: bool = True):
+    def __init__(self, api_key: Optional[str] = None, headless: bool = True,
+                 cache_size: int = 128, semantic_cache: bool = False,
+                 plan_cache_size: int = 64, plan_cache_path: Optional[str] = None,
+                 history_limit: int = 128, history_file: Optional[str] = None):
         """
         Initialize the CLI with an AI Agent.
         
         Args:
             api_key: OpenAI API key. If None, tries to get from environment variable.
             headless: Whether to run the browser in headless mode.
+            cache_size: Maximum number of cached AI responses. Only responses without
+                        terminal or browser actions are cached. 0 disables caching.
+            semantic_cache: Whether to reuse responses for semantically similar requests.
+            plan_cache_size: Maximum number of cached plans. 0 disables plan caching.
+            plan_cache_path: Optional JSON file used to persist cached plans.
+            history_limit: Maximum number of processed requests kept in the agent's task history.
+            history_file: Optional file used to keep line-editing history between
+                          interactive sessions.
         """
         self.api_key = api_key
         self.headless = headless
+        self.cache_size = cache_size
+        self.semantic_cache = semantic_cache
+        self.plan_cache_size = plan_cache_size
+        self.plan_cache_path = plan_cache_path
+        self.history_limit = history_limit
+        self.history_file = os.path.expanduser(history_file) if history_file else None
         self.agent = None
         self.running = False
-        self.history = []
-        
-        # Set up signal handlers
-        signal.signal(signal.SIGINT, self._handle_interrupt)
-        signal.signal(signal.SIGTERM, self._handle_terminate)
+        self.history: Deque[str] = deque(maxlen=HISTORY_LENGTH)
+        
+        # CLI commands: those without arguments, and those taking the rest of the line
+        self._commands = {
+            "help": self._show_help,
+            "status": self._show_status,
+            "history": self._show_history
+        }
+        self._arg_commands = {
+            "execute": self._execute_terminal_command,
+            "browse": lambda url: self._execute_browser_action("navigate", url=url),
+            "plan": self._execute_plan
+        }
+        
+        # Set up signal handling. The interpreter writes each signal number to
+        # a wakeup socket as soon as it arrives, even while the main thread is
+        # blocked in C code, and a dedicated thread reads it and does the
+        # printing and shutdown. Nothing runs in the interrupted main thread.
+        self._readline = None
+        self._signal_reader, signal_writer = socket.socketpair()
+        signal_writer.setblocking(False)
+        self._signal_writer = signal_writer
+        signal.set_wakeup_fd(signal_writer.fileno())
+        signal.signal(signal.SIGINT, self._on_signal)
+        signal.signal(signal.SIGTERM, self._on_signal)
+        threading.Thread(target=self._signal_loop, name="cli-signals", daemon=True).start()
         
         logger.info("AI Agent CLI initialized")
     
-    def _handle_interrupt(self, sig, frame):
+    def _on_signal(self, sig, frame):
         """
-        Handle keyboard interrupt (Ctrl+C).
+        Signal handler: nothing to do, the signal is handled by the signal
+        thread through the wakeup socket.
         """
-        print("\nInterrupted by user. Type 'exit' to quit or press Enter to continue.")
     
-    def _handle_terminate(self, sig, frame):
+    def _signal_loop(self):
         """
-        Handle termination signal.
+        Handle signals read from the wakeup socket.
         """
-        print("\nTermination signal received. Shutting down...")
-        self.shutdown()
-        sys.exit(0)
+        while True:
+            for sig in self._signal_reader.recv(64):
+                if sig == signal.SIGINT:
+                    print("\nInterrupted by user. Type 'exit' to quit or press Enter to continue.")
+                elif sig == signal.SIGTERM:
+                    print("\nTermination signal received. Shutting down...")
+                    self.shutdown()
+                    self._save_line_editing_history(self._readline)
+                    logging.shutdown()
+                    # Exit from this thread without waiting for the main thread;
+                    # os._exit skips the interpreter's own flushing
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(0)
     
     def initialize_agent(self):
         """
         Initialize the AI Agent.
         """
         try:
+            from ai_agent import AIAgent
+            
             print("Initializing AI Agent...")
-            self.agent = AIAgent(api_key=self.api_key, headless=self.headless)
+            self.agent = AIAgent(api_key=self.api_key, headless=self.headless,
+                                 cache_size=self.cache_size, semantic_cache=self.semantic_cache,
+                                 plan_cache_size=self.plan_cache_size,
+                                 plan_cache_path=self.plan_cache_path,
+                                 history_limit=self.history_limit)
             print("AI Agent initialized successfully!")
             return True
         except Exception as e:
@@ -113,47 +185,31 @@ class AIAgentCLI:
         """
         command = command.strip()
         
-        # Add to history
-        if command and command not in ["exit", "quit"]:
+        # Add to history, skipping consecutive duplicates like readline does
+        if command and command not in ["exit", "quit"] and (not self.history or self.history[-1] != command):
             self.history.append(command)
         
         # Process special commands
         if not command:
             return True
         
-        if command.lower() in ["exit", "quit"]:
-            self.shutdown()
-            return False
-        
-        if command.lower() == "help":
-            self._show_help()
-            return True
-        
-        if command.lower() == "status":
-            self._show_status()
-            return True
-        
-        if command.lower() == "history":
-            self._show_history()
-            return True
-        
-        if command.lower().startswith("execute "):
-            # Direct terminal command execution
-            terminal_command = command[8:].strip()
-            self._execute_terminal_command(terminal_command)
-            return True
-        
-        if command.lower().startswith("browse "):
-            # Direct browser navigation
-            url = command[7:].strip()
-            self._execute_browser_action("navigate", url=url)
-            return True
-        
-        if command.lower().startswith("plan "):
-            # Execute a plan for a goal
-            goal = command[5:].strip()
-            self._execute_plan(goal)
-            return True
+        match = _COMMAND_RE.fullmatch(command)
+        if match:
+            verb = match.group("verb").lower()
+            arg = match.group("arg")
+            
+            if arg:
+                # Direct terminal command, browser navigation or plan
+                handler = self._arg_commands.get(verb)
+                if handler:
+                    handler(arg)
+                    return True
+            elif verb in ("exit", "quit"):
+                self.shutdown()
+                return False
+            elif verb in self._commands:
+                self._commands[verb]()
+                return True
         
         # Default: process as a user request
         self._process_user_request(command)
@@ -195,13 +251,13 @@ class AIAgentCLI:
         self.agent.update_context()
         context = self.agent.current_context
         
-        print(f"Current Directory: {context.get('terminal_dir', 'Unknown')}")
-        print(f"Browser URL: {context.get('browser_url', 'Not browsing')}")
-        print(f"Browser Title: {context.get('browser_title', '')}")
+        print(f"Current Directory: {context.terminal_dir or 'Unknown'}")
+        print(f"Browser URL: {context.browser_url or 'Not browsing'}")
+        print(f"Browser Title: {context.browser_title or ''}")
         
         # Show last command if available
-        if context.get('last_command'):
-            print(f"\nLast Command: {context['last_command']}")
+        if context.last_command:
+            print(f"\nLast Command: {context.last_command}")
         
         print()
     
@@ -227,8 +283,12 @@ class AIAgentCLI:
             return
         
         print(f"\nExecuting: {command}")
-        result = self.agent.execute_terminal_command(command)
-        
+        self._print_terminal_result(self.agent.execute_terminal_command(command))
+    
+    def _print_terminal_result(self, result: Dict[str, Any]):
+        """
+        Print the result of a terminal command.
+        """
         print(f"Status: {'Success' if result['status'] == 0 else 'Failed'}")
         if result['stdout']:
             print("\nOutput:")
@@ -247,8 +307,12 @@ class AIAgentCLI:
             return
         
         print(f"\nExecuting browser action: {action}")
-        result = self.agent.execute_browser_action(action, **kwargs)
-        
+        self._print_browser_result(self.agent.execute_browser_action(action, **kwargs))
+    
+    def _print_browser_result(self, result: Dict[str, Any]):
+        """
+        Print the result of a browser action.
+        """
         print(f"Result: {result['message']}")
         if 'content' in result:
             print("\nContent:")
@@ -272,36 +336,39 @@ class AIAgentCLI:
         try:
             result = self.agent.execute_plan(goal)
             
-            print("\nPlan Execution Results:")
-            print("----------------------")
+            # Collect the report and write it in one go
+            out = ["", "Plan Execution Results:", "----------------------"]
             
             # Display the plan
-            print("\nPlan:")
+            out.append("\nPlan:")
             for step in result['plan']:
-                print(f"{step.get('step', '?')}. {step.get('action', 'Action')}: {step.get('description', '')}")
+                out.append(f"{step.get('step', '?')}. {step.get('action', 'Action')}: {step.get('description', '')}")
             
             # Display results
-            print("\nExecution Results:")
+            out.append("\nExecution Results:")
             for i, step_result in enumerate(result['results'], 1):
                 step_num = step_result.get('step', str(i))
-                print(f"\nStep {step_num}:")
+                out.append(f"\nStep {step_num}:")
                 
                 if 'command' in step_result:
-                    print(f"Command: {step_result['command']}")
-                    print(f"Status: {'Success' if step_result.get('status', -1) == 0 else 'Failed'}")
+                    out.append(f"Command: {step_result['command']}")
+                    out.append(f"Status: {'Success' if step_result.get('status', -1) == 0 else 'Failed'}")
                     if 'output' in step_result:
-                        print(f"Output: {step_result['output'][:200]}..." if len(step_result.get('output', '')) > 200 else step_result.get('output', ''))
+                        output = step_result['output']
+                        preview = output[:200]
+                        out.append(f"Output: {preview}..." if len(preview) < len(output) else f"Output: {output}")
                 
                 elif 'browser_action' in step_result:
-                    print(f"Browser Action: {step_result['browser_action']}")
-                    print(f"Result: {step_result.get('message', '')}")
+                    out.append(f"Browser Action: {step_result['browser_action']}")
+                    out.append(f"Result: {step_result.get('message', '')}")
                 
                 elif 'results' in step_result:
-                    print(f"Action: {step_result.get('action', 'Unknown')}")
-                    print(f"Description: {step_result.get('description', '')}")
-                    print(f"Results: {len(step_result['results'])} action(s) performed")
+                    out.append(f"Action: {step_result.get('action', 'Unknown')}")
+                    out.append(f"Description: {step_result.get('description', '')}")
+                    out.append(f"Results: {len(step_result['results'])} action(s) performed")
             
-            print("\nPlan execution completed!")
+            out.append("\nPlan execution completed!")
+            sys.stdout.write("\n".join(out) + "\n")
             
         except Exception as e:
             logger.error(f"Error executing plan: {str(e)}")
@@ -321,27 +388,70 @@ class AIAgentCLI:
         try:
             result = self.agent.process_user_request(request)
             
+            # Collect the report and write it in one go
+            out = []
+            
             # Display AI response
             for action_result in result["results"]:
                 if action_result["action"] == "response":
-                    print("\nAI Response:")
-                    print(action_result["text"])
+                    out.append("\nAI Response:")
+                    out.append(action_result["text"])
                 
                 elif action_result["action"] == "terminal":
-                    print(f"\nExecuted command: {action_result['command']}")
-                    print(f"Status: {'Success' if action_result['status'] == 0 else 'Failed'}")
-                    print(f"Output: {action_result['output']}")
+                    out.append(f"\nExecuted command: {action_result['command']}")
+                    out.append(f"Status: {'Success' if action_result['status'] == 0 else 'Failed'}")
+                    out.append(f"Output: {action_result['output']}")
                 
                 elif action_result["action"] == "browser":
-                    print(f"\nBrowser action: {action_result['browser_action']}")
-                    print(f"Result: {action_result['message']}")
+                    out.append(f"\nBrowser action: {action_result['browser_action']}")
+                    out.append(f"Result: {action_result['message']}")
             
-            print()
+            out.append("")
+            sys.stdout.write("\n".join(out) + "\n")
             
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
             print(f"Error processing request: {str(e)}")
     
+    def _setup_line_editing(self):
+        """
+        Enable readline line editing and load the saved history.
+        
+        readline is only imported for interactive sessions on a terminal;
+        single commands and piped input never pay for loading it or its
+        configuration, nor inherit its terminal and signal handling.
+        
+        Returns:
+            The readline module, or None if it is not available or not used.
+        """
+        if not sys.stdin.isatty():
+            return None
+        
+        try:
+            import readline
+        except ImportError:
+            return None
+        
+        readline.set_history_length(HISTORY_LENGTH)
+        if self.history_file and os.path.exists(self.history_file):
+            try:
+                readline.read_history_file(self.history_file)
+            except OSError as e:
+                logger.warning(f"Could not read history file {self.history_file}: {str(e)}")
+        return readline
+    
+    def _save_line_editing_history(self, readline):
+        """
+        Save the readline history, truncated to HISTORY_LENGTH lines so the
+        next session's read stays small.
+        """
+        if readline is None or not self.history_file:
+            return
+        try:
+            readline.write_history_file(self.history_file)
+        except OSError as e:
+            logger.warning(f"Could not write history file {self.history_file}: {str(e)}")
+    
     def run_interactive(self):
         """
         Run the CLI in interactive mode.
@@ -349,6 +459,7 @@ class AIAgentCLI:
         if not self.initialize_agent():
             return
         
+        self._readline = self._setup_line_editing()
         self.running = True
         
         print("\nAI Agent CLI")
@@ -375,6 +486,7 @@ class AIAgentCLI:
                 logger.error(f"Error in command loop: {str(e)}")
                 print(f"Error: {str(e)}")
         
+        self._save_line_editing_history(self._readline)
         self.shutdown()
     
     def run_single_command(self, command: str):
@@ -388,6 +500,50 @@ class AIAgentCLI:
         self.process_command(command)
         self.shutdown()
 
+    def run_terminal_command(self, command: str):
+        """
+        Execute a single terminal command and exit.
+        
+        Only a TerminalController is created; starting the browser and the
+        AI client would dominate the run time of a direct command.
+        """
+        from terminal_control import TerminalController
+        from ai_agent import MAX_COMMAND_OUTPUT
+        
+        print(f"\nExecuting: {command}")
+        # Persistent like the agent's terminal, so commands run through bash
+        terminal = TerminalController(persistent=True)
+        try:
+            self._print_terminal_result(terminal.execute_command(command, max_output=MAX_COMMAND_OUTPUT))
+        finally:
+            terminal.close()
+    
+    def run_browse(self, url: str):
+        """
+        Navigate to a URL and exit.
+        
+        Only a WebController is created; the terminal and AI client are not
+        needed for direct navigation.
+        """
+        from web_interaction import WebController
+        
+        print("\nExecuting browser action: navigate")
+        try:
+            web = WebController(headless=self.headless)
+        except Exception as e:
+            logger.error(f"Error starting browser: {str(e)}")
+            print(f"Error starting browser: {str(e)}")
+            return
+        
+        try:
+            success = web.navigate_to(url)
+            self._print_browser_result({
+                "success": success,
+                "message": f"Navigated to {url}" if success else f"Failed to navigate to {url}"
+            })
+        finally:
+            web.close()
+
 def main():
     """
     Main entry point for the CLI.
@@ -400,18 +556,27 @@ def main():
     parser.add_argument("--execute", help="Execute a terminal command and exit")
     parser.add_argument("--browse", help="Navigate to a URL and exit")
     parser.add_argument("--plan", help="Execute a plan for a goal and exit")
+    parser.add_argument("--cache-size", type=int, default=128, help="Maximum number of cached AI responses without actions (0 disables caching)")
+    parser.add_argument("--semantic-cache", action="store_true", help="Reuse cached responses for semantically similar requests")
+    parser.add_argument("--plan-cache-size", type=int, default=64, help="Maximum number of cached plans (0 disables plan caching)")
+    parser.add_argument("--plan-cache-file", help="JSON file used to persist cached plans (e.g. ~/.ai_agent/plans.json)")
+    parser.add_argument("--history-limit", type=int, default=128, help="Maximum number of processed requests kept in the task history")
+    parser.add_argument("--history-file", help="File used to keep interactive line-editing history between sessions (e.g. ~/.ai_agent_history)")
     args = parser.parse_args()
     
     # Create the CLI
-    cli = AIAgentCLI(api_key=args.api_key, headless=args.headless)
+    cli = AIAgentCLI(api_key=args.api_key, headless=args.headless,
+                     cache_size=args.cache_size, semantic_cache=args.semantic_cache,
+                     plan_cache_size=args.plan_cache_size, plan_cache_path=args.plan_cache_file,
+                     history_limit=args.history_limit, history_file=args.history_file)
     
     # Run in the appropriate mode
     if args.command:
         cli.run_single_command(args.command)
     elif args.execute:
-        cli.run_single_command(f"execute {args.execute}")
+        cli.run_terminal_command(args.execute)
     elif args.browse:
-        cli.run_single_command(f"browse {args.browse}")
+        cli.run_browse(args.browse)
     elif args.plan:
         cli.run_single_command(f"plan {args.plan}")
     else:
@@ -98,10 +98,8 @@ def example_integrated_agent():
         print("Warning: No OpenAI API key found. AI functionality will be limited.")
         print("Set your API key in the .env file for full functionality.")
     
-    # Create an AI Agent
-    agent = AIAgent(api_key=api_key)
-    
-    try:
+    # Create an AI Agent; it is closed automatically when the block exits
+    with AIAgent(api_key=api_key) as agent:
         # Example 1: Execute a terminal command
         print("Example 1: Execute a terminal command through the agent")
         result = agent.execute_terminal_command("echo 'Hello from the AI Agent!'")
@@ -125,10 +123,6 @@ def example_integrated_agent():
                     print(action_result["text"])
         else:
             print("Skipping this example due to missing API key")
-        
-    finally:
-        # Close the agent
-        agent.close()
     
     print("\nIntegrated AI Agent examples completed")
 
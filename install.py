@@ -11,6 +11,7 @@ import sys
 import subprocess
 import argparse
 import platform
+import importlib.util
 import shutil
 from pathlib import Path
 
@@ -40,9 +41,17 @@ def install_dependencies():
         "python-dotenv"
     ]
     
+    # Install everything in a single resolver run; prefer uv when available
+    env = {**os.environ, "PIP_DISABLE_PIP_VERSION_CHECK": "1", "PYTHONDONTWRITEBYTECODE": "1"}
+    uv = shutil.which("uv")
+    if uv:
+        command = [uv, "pip", "install", "--python", sys.executable] + packages
+    else:
+        command = [sys.executable, "-m", "pip", "install", "--upgrade",
+                   "--disable-pip-version-check", "--no-input", "pip"] + packages
+    
     try:
-        subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", "pip"], check=True)
-        subprocess.run([sys.executable, "-m", "pip", "install"] + packages, check=True)
+        subprocess.run(command, check=True, env=env)
         print("All packages installed successfully.")
         return True
     except subprocess.CalledProcessError as e:
@@ -72,6 +81,14 @@ def check_browser():
     """Check if Chrome browser is installed."""
     print("Checking for Chrome browser...")
     
+    # Look for Chrome on PATH in-process (the usual case on Linux)
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path:
+            print(f"Chrome found at: {path}")
+            return True
+    
+    # Otherwise check the default install locations
     system = platform.system()
     
     if system == "Windows":
@@ -91,47 +108,34 @@ def check_browser():
             print(f"Chrome found at: {chrome_path}")
             return True
     
-    elif system == "Linux":
-        try:
-            result = subprocess.run(["which", "google-chrome"], capture_output=True, text=True)
-            if result.returncode == 0:
-                print(f"Chrome found at: {result.stdout.strip()}")
-                return True
-        except:
-            pass
-    
     print("Warning: Chrome browser not found. It's required for web interaction.")
     print("Please install Chrome browser before using the web interaction features.")
     return False
 
 def verify_installation():
-    """Verify the installation by running a simple test."""
+    """Verify the installation by checking that all modules can be found."""
     print("Verifying installation...")
     
     try:
-        # Import key modules to verify they're installed correctly
-        import_test = subprocess.run(
-            [sys.executable, "-c", "import selenium, bs4, openai, langchain, webdriver_manager, dotenv"],
-            capture_output=True,
-            text=True
-        )
+        # Look the modules up in-process instead of spawning interpreters to import them
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if script_dir not in sys.path:
+            sys.path.insert(0, script_dir)
         
-        if import_test.returncode != 0:
-            print(f"Error importing modules: {import_test.stderr}")
+        packages = ["selenium", "bs4", "openai", "langchain", "webdriver_manager", "dotenv"]
+        missing = [name for name in packages if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"Error: required modules not found: {', '.join(missing)}")
             return False
         
-        # Try to import our own modules
-        import_our_modules = subprocess.run(
-            [sys.executable, "-c", "import sys; sys.path.append('.'); import terminal_control, web_interaction, ai_decision"],
-            capture_output=True,
-            text=True
-        )
-        
-        if import_our_modules.returncode != 0:
-            print(f"Error importing AI Agent modules: {import_our_modules.stderr}")
+        # Check our own modules
+        our_modules = ["terminal_control", "web_interaction", "ai_decision"]
+        missing = [name for name in our_modules if importlib.util.find_spec(name) is None]
+        if missing:
+            print(f"Error: AI Agent modules not found: {', '.join(missing)}")
             return False
         
-        print("All modules imported successfully.")
+        print("All modules found.")
         return True
     
     except Exception as e:
@@ -9,120 +9,665 @@ parsing command outputs, and handling errors in terminal operations.
 import subprocess
 import shlex
 import os
+import re
+import time
+import uuid
+import shutil
+import signal
+import stat
 import logging
-from typing import Dict, List, Optional, Tuple, Union
+import selectors
+import threading
+import functools
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger('terminal_control')
 
+# Default read size when streaming command output
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Built-in output filters, compiled once at import
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+_ERROR_RE = re.compile(r'(?i)^error')
+_WARN_RE = re.compile(r'(?i)^warn')
+
+@functools.lru_cache(maxsize=128)
+def _compile_pattern(pattern: str) -> "re.Pattern":
+    """
+    Compile a regex pattern, reusing the result for repeated patterns.
+    
+    Args:
+        pattern: The regex pattern to compile.
+        
+    Returns:
+        The compiled pattern.
+    """
+    return re.compile(pattern)
+
+@functools.lru_cache(maxsize=256)
+def _split(command: str) -> Tuple[str, ...]:
+    """
+    Split a command string into arguments, reusing the result for repeated commands.
+    
+    Args:
+        command: The command string to split.
+        
+    Returns:
+        The command arguments.
+    """
+    return tuple(shlex.split(command))
+
+@functools.lru_cache(maxsize=256)
+def _resolve_executable(name: str, path: Optional[str]) -> str:
+    """
+    Resolve a program name to an absolute path, caching the lookup per PATH.
+    
+    Args:
+        name: The program name or path.
+        path: The PATH value used for the lookup.
+        
+    Returns:
+        The absolute path, or the name unchanged if it cannot be resolved.
+    """
+    if os.path.dirname(name):
+        return name
+    return shutil.which(name, path=path) or name
+
+def _error_result(command: str, error: Union[str, Exception]) -> Dict[str, Union[int, str, List[str]]]:
+    """
+    Build the result returned when a command could not be run to completion.
+    
+    Args:
+        command: The command that failed.
+        error: The error message or exception.
+        
+    Returns:
+        A dictionary in the same format as a normal command result.
+    """
+    message = str(error)
+    return {
+        'status': -1,
+        'command': command,
+        'stdout': '',
+        'stderr': message,
+        'stdout_lines': [],
+        'stderr_lines': [message]
+    }
+
+class _LazyResult(dict):
+    """
+    A command result that splits stdout/stderr into lines only when asked.
+    
+    It stays a plain dict subclass so results can still be serialized, but
+    'stdout_lines' and 'stderr_lines' are computed on first access and then
+    stored like any other key.
+    """
+    
+    _LINE_KEYS = {'stdout_lines': 'stdout', 'stderr_lines': 'stderr'}
+    
+    def __missing__(self, key):
+        source = self._LINE_KEYS.get(key)
+        if source is None or source not in self:
+            raise KeyError(key)
+        text = dict.__getitem__(self, source)
+        lines = text.splitlines() if text else []
+        self[key] = lines
+        return lines
+    
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (
+            key in self._LINE_KEYS and dict.__contains__(self, self._LINE_KEYS[key])
+        )
+    
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+class _MarkedStream:
+    """
+    Output of one persistent-shell stream up to the marker that ends it.
+    
+    At most `cap` bytes of output are kept. The marker is searched for in a
+    short rolling tail that never becomes part of the output, so capping the
+    kept bytes cannot join the end of the stream onto its start.
+    """
+    
+    __slots__ = ("end", "cap", "head", "tail", "size", "found", "rest")
+    
+    def __init__(self, end: bytes, cap: Optional[int]):
+        self.end = end
+        self.cap = cap
+        self.head = bytearray()
+        self.tail = b""
+        # Bytes read so far, stream offset of the marker, and what followed it
+        self.size = 0
+        self.found: Optional[int] = None
+        self.rest = bytearray()
+    
+    def feed(self, data: bytes):
+        if self.found is not None:
+            self.rest.extend(data)
+            return
+        
+        window = self.tail + data
+        index = window.find(self.end)
+        if index != -1:
+            self.found = self.size - len(self.tail) + index
+            self.rest.extend(window[index + len(self.end):])
+        else:
+            self.tail = window[-(len(self.end) - 1):]
+        
+        if self.cap is None:
+            self.head.extend(data)
+        elif len(self.head) < self.cap:
+            self.head.extend(data[:self.cap - len(self.head)])
+        self.size += len(data)
+    
+    def output(self) -> bytes:
+        return bytes(self.head[:self.found])
+    
+    @property
+    def truncated(self) -> bool:
+        return self.cap is not None and self.found > self.cap
+
 class TerminalController:
     """
     A class to handle terminal operations including command execution,
     output parsing, and error handling.
     """
     
-    def __init__(self, working_dir: Optional[str] = None):
+    def __init__(self, working_dir: Optional[str] = None, persistent: bool = False):
         """
         Initialize the TerminalController.
         
         Args:
             working_dir: The working directory for command execution.
                          If None, uses the current directory.
+            persistent: Whether to run commands through one long-lived bash
+                        process instead of spawning a new process per command.
+                        Commands are then interpreted by bash, so `;`, `|`, `&`,
+                        redirections and variables take effect, whereas the
+                        one-process-per-command path splits them with shlex
+                        and passes such characters to the program literally.
         """
         self.working_dir = working_dir or os.getcwd()
-        logger.info(f"Initialized TerminalController with working directory: {self.working_dir}")
+        self.persistent = persistent and shutil.which("bash") is not None
+        if persistent and not self.persistent:
+            logger.warning("bash not found; falling back to one process per command")
+        self._shell = None
+        self._shell_lock = threading.Lock()
+        logger.info("Initialized TerminalController with working directory: %s", self.working_dir)
+    
+    def _spawn_kwargs(self, args: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Prepare arguments so subprocess can start the child with posix_spawn.
+        
+        subprocess only takes its posix_spawn fast path for an absolute
+        executable, no cwd change and close_fds=False. Descriptors created by
+        Python are non-inheritable, so not closing them in the child is safe.
+        The resolved path is passed as `executable` so argv[0], which programs
+        use in their messages, stays as given.
+        
+        Args:
+            args: The parsed command arguments.
+            
+        Returns:
+            The arguments, and the keyword arguments to pass to subprocess.
+        """
+        kwargs = {
+            'cwd': None if self.working_dir == os.getcwd() else self.working_dir,
+            'close_fds': False
+        }
+        if args:
+            kwargs['executable'] = _resolve_executable(args[0], os.environ.get("PATH"))
+        return list(args), kwargs
     
     def execute_command(self, command: str, timeout: int = 60, 
-                        capture_output: bool = True) -> Dict[str, Union[int, str, List[str]]]:
+                        capture_output: bool = True,
+                        max_output: Optional[int] = None,
+                        stream_chunk_size: Optional[int] = None,
+                        on_chunk: Optional[Callable[[bytes], None]] = None,
+                        text: bool = True) -> Dict[str, Union[int, str, bytes, List[str], List[bytes]]]:
         """
         Execute a shell command and return the result.
         
         Args:
             command: The command to execute.
             timeout: Maximum time in seconds to wait for command completion.
-            capture_output: Whether to capture and return command output.
+            capture_output: Whether to capture and return command output. If False,
+                            the result only holds 'status' and 'command'.
+            max_output: Maximum number of characters to keep from each of stdout
+                        and stderr. Output beyond the limit is read and discarded
+                        so it never accumulates in memory. None keeps everything.
+            stream_chunk_size: Read stdout in chunks of this many bytes while the
+                               command runs, decoding it once at the end.
+            on_chunk: Optional callback receiving each raw stdout chunk as it is
+                      read. Setting it enables streaming with 64 KiB chunks
+                      unless stream_chunk_size is given.
+            text: Whether to decode output to str. If False, stdout and stderr
+                  are returned as bytes and the line lists hold bytes too.
             
         Returns:
             A dictionary containing:
                 - status: The exit code (0 typically means success)
-                - stdout: The standard output as a string
-                - stderr: The standard error as a string
+                - stdout: The standard output as a string (bytes if text is False)
+                - stderr: The standard error as a string (bytes if text is False)
                 - stdout_lines: The standard output split into lines
                 - stderr_lines: The standard error split into lines
                 - command: The original command that was executed
+                - truncated: Whether output was cut at max_output (only when max_output is set)
         """
-        logger.info(f"Executing command: {command}")
+        logger.info("Executing command: %s", command)
         
         try:
             # Use shlex to properly handle command arguments
             if isinstance(command, str):
-                args = shlex.split(command)
+                args = list(_split(command))
             else:
                 args = command
+            
+            # Without capture there are no pipes to set up and nothing to collect
+            if not capture_output:
+                args, spawn_kwargs = self._spawn_kwargs(args)
+                status = subprocess.call(args, **spawn_kwargs, timeout=timeout)
+                logger.info("Command executed with status: %s", status)
+                return {'status': status, 'command': command}
+            
+            if stream_chunk_size or on_chunk:
+                return self._execute_streaming(command, args, timeout, max_output,
+                                               stream_chunk_size or STREAM_CHUNK_SIZE, on_chunk, text)
+            
+            if self.persistent and isinstance(command, str):
+                return self._execute_persistent(command, timeout, max_output, text)
+            
+            if max_output is not None:
+                return self._execute_bounded(command, args, timeout, max_output, text)
                 
             # Execute the command
+            args, spawn_kwargs = self._spawn_kwargs(args)
             process = subprocess.run(
                 args,
-                cwd=self.working_dir,
-                capture_output=capture_output,
-                text=True,
+                **spawn_kwargs,
+                capture_output=True,
+                text=text,
                 timeout=timeout
             )
             
-            # Prepare the result
-            result = {
-                'status': process.returncode,
-                'command': command,
-            }
-            
-            if capture_output:
-                result['stdout'] = process.stdout
-                result['stderr'] = process.stderr
-                result['stdout_lines'] = process.stdout.splitlines() if process.stdout else []
-                result['stderr_lines'] = process.stderr.splitlines() if process.stderr else []
+            # Prepare the result; line lists are split on first access
+            result = _LazyResult(
+                status=process.returncode,
+                command=command,
+                stdout=process.stdout,
+                stderr=process.stderr
+            )
             
-            logger.info(f"Command executed with status: {process.returncode}")
+            logger.info("Command executed with status: %s", process.returncode)
             return result
             
         except subprocess.TimeoutExpired:
-            logger.error(f"Command timed out after {timeout} seconds: {command}")
-            return {
-                'status': -1,
-                'command': command,
-                'stdout': '',
-                'stderr': f'Command timed out after {timeout} seconds',
-                'stdout_lines': [],
-                'stderr_lines': [f'Command timed out after {timeout} seconds']
-            }
+            logger.error("Command timed out after %s seconds: %s", timeout, command)
+            return _error_result(command, f'Command timed out after {timeout} seconds')
+            
+        except FileNotFoundError as e:
+            logger.error("Command not found: %s, Error: %s", command, e)
+            return _error_result(command, e)
+            
+        except (OSError, subprocess.SubprocessError, ValueError, RuntimeError) as e:
+            # ValueError covers unbalanced quotes from shlex, RuntimeError a dead persistent shell
+            logger.error("Error executing command: %s, Error: %s", command, e)
+            return _error_result(command, e)
+    
+    @staticmethod
+    def _read_bounded(stream, limit: int, sink: Dict[str, Any], empty: Union[str, bytes] = ''):
+        """
+        Read a stream to EOF, keeping at most `limit` characters (or bytes).
+        
+        Args:
+            stream: The stream to read from.
+            limit: Maximum number of characters to keep.
+            sink: Dictionary receiving 'text' and 'truncated' keys.
+            empty: An empty value of the stream's type, used to join the chunks.
+        """
+        chunks = []
+        kept = 0
+        truncated = False
+        try:
+            while True:
+                data = stream.read(8192)
+                if not data:
+                    break
+                # Anything past the limit is drained so the child never blocks on a full pipe
+                room = limit - kept
+                if room > 0:
+                    chunks.append(data[:room])
+                    kept += min(room, len(data))
+                if len(data) > room:
+                    truncated = True
+        finally:
+            stream.close()
+        sink['text'] = empty.join(chunks)
+        sink['truncated'] = truncated
+    
+    def _execute_bounded(self, command: str, args: List[str], timeout: int,
+                         max_output: int, text: bool = True) -> Dict[str, Union[int, str, bytes, List[str], List[bytes]]]:
+        """
+        Execute a command while capping how much of its output is kept.
+        
+        Args:
+            command: The original command, used in the result.
+            args: The parsed command arguments.
+            timeout: Maximum time in seconds to wait for command completion.
+            max_output: Maximum number of characters to keep per stream.
+            text: Whether to decode output to str.
+            
+        Returns:
+            A dictionary with the command result (same format as execute_command).
+        """
+        args, spawn_kwargs = self._spawn_kwargs(args)
+        process = subprocess.Popen(
+            args,
+            **spawn_kwargs,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=text
+        )
+        
+        empty = '' if text else b''
+        stdout_sink, stderr_sink = {}, {}
+        readers = [
+            threading.Thread(target=self._read_bounded, args=(process.stdout, max_output, stdout_sink, empty), daemon=True),
+            threading.Thread(target=self._read_bounded, args=(process.stderr, max_output, stderr_sink, empty), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            for reader in readers:
+                reader.join()
+            raise
+        
+        for reader in readers:
+            reader.join()
+        
+        stdout = stdout_sink.get('text', empty)
+        stderr = stderr_sink.get('text', empty)
+        logger.info("Command executed with status: %s", process.returncode)
+        return _LazyResult(
+            status=process.returncode,
+            command=command,
+            stdout=stdout,
+            stderr=stderr,
+            truncated=stdout_sink.get('truncated', False) or stderr_sink.get('truncated', False)
+        )
+    
+    def _execute_streaming(self, command: str, args: List[str], timeout: int,
+                           max_output: Optional[int], chunk_size: int,
+                           on_chunk: Optional[Callable[[bytes], None]],
+                           text: bool = True) -> Dict[str, Union[int, str, bytes, List[str], List[bytes]]]:
+        """
+        Execute a command, reading its stdout in chunks as soon as they arrive.
+        
+        Args:
+            command: The original command, used in the result.
+            args: The parsed command arguments.
+            timeout: Maximum time in seconds to wait for command completion.
+            max_output: Maximum number of characters to keep per stream, or None.
+            chunk_size: Maximum number of bytes to read from stdout at a time.
+            on_chunk: Optional callback receiving each raw stdout chunk.
+            text: Whether to decode output to str.
             
-        except Exception as e:
-            logger.error(f"Error executing command: {command}, Error: {str(e)}")
-            return {
-                'status': -1,
-                'command': command,
-                'stdout': '',
-                'stderr': str(e),
-                'stdout_lines': [],
-                'stderr_lines': [str(e)]
-            }
+        Returns:
+            A dictionary with the command result (same format as execute_command).
+        """
+        args, spawn_kwargs = self._spawn_kwargs(args)
+        process = subprocess.Popen(
+            args,
+            **spawn_kwargs,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=chunk_size
+        )
+        
+        # A character is at most 4 bytes in UTF-8, so this keeps enough to fill max_output
+        keep = max_output * 4 if max_output is not None else None
+        
+        # stderr is drained on a thread so a chatty child never blocks on it
+        stderr_sink = {}
+        if keep is None:
+            stderr_reader = threading.Thread(
+                target=lambda: stderr_sink.update(text=process.stderr.read()), daemon=True
+            )
+        else:
+            stderr_reader = threading.Thread(
+                target=self._read_bounded, args=(process.stderr, keep, stderr_sink, b''), daemon=True
+            )
+        stderr_reader.start()
+        
+        # Kill the child if it runs past the timeout; the read loop then sees EOF
+        timed_out = threading.Event()
+        def _on_timeout():
+            timed_out.set()
+            process.kill()
+        timer = threading.Timer(timeout, _on_timeout)
+        timer.start()
+        
+        buf = bytearray()
+        truncated = False
+        try:
+            # read1 returns whatever is available instead of waiting for a full chunk
+            while chunk := process.stdout.read1(chunk_size):
+                if on_chunk:
+                    on_chunk(chunk)
+                if keep is None:
+                    buf.extend(chunk)
+                else:
+                    room = keep - len(buf)
+                    if room > 0:
+                        buf.extend(chunk[:room])
+                    if len(chunk) > room:
+                        truncated = True
+            process.wait()
+            stderr_reader.join()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+            # A failing callback must not leave the child running
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, timeout)
+        
+        stdout = bytes(buf)
+        stderr = stderr_sink.get('text', b'')
+        truncated = truncated or stderr_sink.get('truncated', False)
+        if text:
+            stdout, stderr = stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        process.stderr.close()
+        
+        result = _LazyResult(status=process.returncode, command=command)
+        if max_output is not None:
+            truncated = truncated or len(stdout) > max_output or len(stderr) > max_output
+            stdout, stderr = stdout[:max_output], stderr[:max_output]
+            result['truncated'] = truncated
+        result['stdout'] = stdout
+        result['stderr'] = stderr
+        
+        logger.info("Command executed with status: %s", process.returncode)
+        return result
+    
+    def _ensure_shell(self) -> subprocess.Popen:
+        """
+        Start the persistent shell if it is not running.
+        
+        Returns:
+            The running shell process.
+        """
+        if self._shell is None or self._shell.poll() is not None:
+            self._shell = subprocess.Popen(
+                ["bash", "--noprofile", "--norc"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True
+            )
+            logger.info("Started persistent shell with PID %s", self._shell.pid)
+        return self._shell
+    
+    def _kill_shell(self):
+        """
+        Kill the persistent shell and any commands it is running.
+        """
+        if self._shell is None:
+            return
+        try:
+            os.killpg(self._shell.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self._shell.wait()
+        for stream in (self._shell.stdin, self._shell.stdout, self._shell.stderr):
+            stream.close()
+        self._shell = None
+    
+    def _execute_persistent(self, command: str, timeout: int,
+                            max_output: Optional[int], text: bool = True) -> Dict[str, Union[int, str, bytes, List[str], List[bytes]]]:
+        """
+        Execute a command in the persistent shell.
+        
+        The command is interpreted by bash: it runs through eval in a subshell
+        started from the current working directory, so `cd` or `exit` inside
+        it do not affect the shell, and a syntax error or unterminated heredoc
+        fails only that command, with bash's message on stderr. Its end is
+        detected by a unique marker printed on both stdout and stderr. If the
+        shell dies before the command produced any output, the command is
+        retried once on a fresh shell.
+        
+        Args:
+            command: The command to execute.
+            timeout: Maximum time in seconds to wait for command completion.
+            max_output: Maximum number of characters to keep per stream, or None.
+            text: Whether to decode output to str.
+            
+        Returns:
+            A dictionary with the command result (same format as execute_command).
+        """
+        marker = uuid.uuid4().hex
+        out_end = f"\n{marker} ".encode()
+        err_end = f"\n{marker}\n".encode()
+        # eval parses the command inside the subshell, so the persistent shell
+        # never sees its syntax
+        script = (
+            f"cd {shlex.quote(self.working_dir)} && ( eval {shlex.quote(command)} ) < /dev/null\n"
+            f"printf '\\n{marker} %d\\n' \"$?\"\n"
+            f"printf '\\n{marker}\\n' >&2\n"
+        )
+        deadline = time.monotonic() + timeout
+        
+        # Keep enough bytes per stream for max_output characters of UTF-8
+        cap = None if max_output is None else max_output * 4 if text else max_output
+        
+        with self._shell_lock:
+            for attempt in range(2):
+                shell = self._ensure_shell()
+                out = _MarkedStream(out_end, cap)
+                err = _MarkedStream(err_end, cap)
+                streams = {shell.stdout: out, shell.stderr: err}
+                
+                selector = selectors.DefaultSelector()
+                for stream in streams:
+                    selector.register(stream, selectors.EVENT_READ)
+                
+                try:
+                    shell.stdin.write(script.encode())
+                    shell.stdin.flush()
+                    # Done once both markers and the status line after the stdout marker are in
+                    while out.found is None or err.found is None or b"\n" not in out.rest:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._kill_shell()
+                            raise subprocess.TimeoutExpired(command, timeout)
+                        events = selector.select(remaining)
+                        for key, _ in events:
+                            data = os.read(key.fd, 65536)
+                            if not data:
+                                raise EOFError()
+                            streams[key.fileobj].feed(data)
+                    break
+                except (EOFError, BrokenPipeError):
+                    # The shell died; start over on a fresh one, but only rerun the
+                    # command if it had not produced any output yet
+                    self._kill_shell()
+                    if attempt or out.size or err.size:
+                        raise RuntimeError("Persistent shell exited unexpectedly")
+                    logger.warning("Persistent shell exited; retrying on a new shell")
+                finally:
+                    selector.close()
+            
+            status = int(out.rest.split(b"\n", 1)[0].strip() or -1)
+            stdout, stderr = out.output(), err.output()
+            truncated = out.truncated or err.truncated
+            if text:
+                stdout, stderr = stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        
+        if max_output is not None:
+            # Slicing the decoded text keeps whole characters; a character cut at
+            # the byte cap always lies past max_output characters
+            truncated = truncated or len(stdout) > max_output or len(stderr) > max_output
+            stdout, stderr = stdout[:max_output], stderr[:max_output]
+        
+        logger.info("Command executed with status: %s", status)
+        result = _LazyResult(status=status, command=command, stdout=stdout, stderr=stderr)
+        if max_output is not None:
+            result['truncated'] = truncated
+        return result
+    
+    def close(self):
+        """
+        Stop the persistent shell, if one is running.
+        """
+        with self._shell_lock:
+            self._kill_shell()
+    
+    def execute_many(self, commands: List[str], depth: int = 8,
+                     **kwargs) -> List[Dict[str, Union[int, str, bytes, List[str], List[bytes]]]]:
+        """
+        Execute independent commands concurrently.
+        
+        Args:
+            commands: The commands to execute.
+            depth: Maximum number of commands running at the same time.
+            **kwargs: Additional arguments passed to execute_command.
+            
+        Returns:
+            The command results, in the same order as the commands.
+        """
+        with CommandRing(self, depth=depth) as ring:
+            futures = [ring.submit(command, **kwargs) for command in commands]
+            return [future.result() for future in futures]
     
     def execute_interactive_command(self, command: str, 
-                                   inputs: List[str] = None) -> Dict[str, Union[int, str, List[str]]]:
+                                   inputs: List[str] = None,
+                                   timeout: int = 10) -> Dict[str, Union[int, str, List[str]]]:
         """
         Execute an interactive command that requires input during execution.
         
         Args:
             command: The command to execute.
             inputs: A list of inputs to provide to the command when prompted.
+                    They are written to stdin together, one per line.
+            timeout: Maximum time in seconds to wait for command completion.
             
         Returns:
             A dictionary with the command result (same format as execute_command).
         """
-        logger.info(f"Executing interactive command: {command}")
+        logger.info("Executing interactive command: %s", command)
         
         if inputs is None:
             inputs = []
@@ -130,7 +675,7 @@ class TerminalController:
         try:
             # Use shlex to properly handle command arguments
             if isinstance(command, str):
-                args = shlex.split(command)
+                args = list(_split(command))
             else:
                 args = command
                 
@@ -141,54 +686,36 @@ class TerminalController:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                text=True,
+                bufsize=-1
             )
             
-            # Prepare to collect output
-            stdout_data = []
-            stderr_data = []
-            
-            # Provide inputs if any
-            for input_text in inputs:
-                stdout, stderr = process.communicate(input=input_text + '\n', timeout=10)
-                if stdout:
-                    stdout_data.append(stdout)
-                if stderr:
-                    stderr_data.append(stderr)
-            
-            # Get any remaining output
-            final_stdout, final_stderr = process.communicate(timeout=10)
-            if final_stdout:
-                stdout_data.append(final_stdout)
-            if final_stderr:
-                stderr_data.append(final_stderr)
+            # Send all inputs at once; communicate() can only be called once
+            payload = ('\n'.join(inputs) + '\n') if inputs else None
+            try:
+                stdout, stderr = process.communicate(input=payload, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
             
             # Prepare the result
-            stdout_combined = ''.join(stdout_data)
-            stderr_combined = ''.join(stderr_data)
+            result = _LazyResult(status=process.returncode, command=command, stdout=stdout, stderr=stderr)
             
-            result = {
-                'status': process.returncode,
-                'command': command,
-                'stdout': stdout_combined,
-                'stderr': stderr_combined,
-                'stdout_lines': stdout_combined.splitlines() if stdout_combined else [],
-                'stderr_lines': stderr_combined.splitlines() if stderr_combined else []
-            }
-            
-            logger.info(f"Interactive command executed with status: {process.returncode}")
+            logger.info("Interactive command executed with status: %s", process.returncode)
             return result
             
-        except Exception as e:
-            logger.error(f"Error executing interactive command: {command}, Error: {str(e)}")
-            return {
-                'status': -1,
-                'command': command,
-                'stdout': '',
-                'stderr': str(e),
-                'stdout_lines': [],
-                'stderr_lines': [str(e)]
-            }
+        except subprocess.TimeoutExpired:
+            logger.error("Interactive command timed out after %s seconds: %s", timeout, command)
+            return _error_result(command, f'Command timed out after {timeout} seconds')
+            
+        except FileNotFoundError as e:
+            logger.error("Interactive command not found: %s, Error: %s", command, e)
+            return _error_result(command, e)
+            
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            logger.error("Error executing interactive command: %s, Error: %s", command, e)
+            return _error_result(command, e)
     
     def parse_command_output(self, output: str, 
                             pattern: Optional[str] = None) -> List[str]:
@@ -205,12 +732,46 @@ class TerminalController:
         lines = output.splitlines()
         
         if pattern:
-            import re
-            pattern_compiled = re.compile(pattern)
-            return [line for line in lines if pattern_compiled.search(line)]
+            return list(filter(_compile_pattern(pattern).search, lines))
         
         return lines
     
+    def parse_errors(self, output: str) -> List[str]:
+        """
+        Get the lines of command output that start with "error".
+        
+        Args:
+            output: The command output to parse.
+            
+        Returns:
+            The matching lines (case-insensitive).
+        """
+        return list(filter(_ERROR_RE.search, output.splitlines()))
+    
+    def parse_warnings(self, output: str) -> List[str]:
+        """
+        Get the lines of command output that start with "warn".
+        
+        Args:
+            output: The command output to parse.
+            
+        Returns:
+            The matching lines (case-insensitive).
+        """
+        return list(filter(_WARN_RE.search, output.splitlines()))
+    
+    def strip_ansi(self, output: str) -> str:
+        """
+        Remove ANSI color codes from command output.
+        
+        Args:
+            output: The command output to clean.
+            
+        Returns:
+            The output without color escape sequences.
+        """
+        return _ANSI_RE.sub('', output)
+    
     def change_directory(self, directory: str) -> bool:
         """
         Change the working directory for subsequent commands.
@@ -221,17 +782,23 @@ class TerminalController:
         Returns:
             True if successful, False otherwise.
         """
+        # A single stat() tells both whether the path exists and whether it is a directory
         try:
-            if os.path.exists(directory) and os.path.isdir(directory):
-                self.working_dir = directory
-                logger.info(f"Changed working directory to: {directory}")
-                return True
-            else:
-                logger.error(f"Directory does not exist: {directory}")
-                return False
-        except Exception as e:
-            logger.error(f"Error changing directory to {directory}: {str(e)}")
+            st = os.stat(directory)
+        except FileNotFoundError:
+            logger.error("Directory does not exist: %s", directory)
+            return False
+        except (OSError, ValueError) as e:
+            logger.error("Error changing directory to %s: %s", directory, e)
+            return False
+        
+        if not stat.S_ISDIR(st.st_mode):
+            logger.error("Directory does not exist: %s", directory)
             return False
+        
+        self.working_dir = directory
+        logger.info("Changed working directory to: %s", directory)
+        return True
     
     def get_system_info(self) -> Dict[str, str]:
         """
@@ -242,30 +809,120 @@ class TerminalController:
         """
         info = {}
         
-        # Get OS information
-        os_info = self.execute_command("uname -a")
-        if os_info['status'] == 0:
-            info['os'] = os_info['stdout'].strip()
+        # The probes are independent, so run them concurrently
+        probes = {
+            'os': "uname -a",
+            'memory': "free -h",
+            'disk': "df -h"
+        }
+        results = dict(zip(probes, self.execute_many(list(probes.values()), depth=len(probes))))
+        
+        # OS information
+        if results['os']['status'] == 0:
+            info['os'] = results['os']['stdout'].strip()
         
-        # Get CPU information
-        cpu_info = self.execute_command("cat /proc/cpuinfo | grep 'model name' | head -1")
-        if cpu_info['status'] == 0 and cpu_info['stdout_lines']:
-            info['cpu'] = cpu_info['stdout_lines'][0].split(':', 1)[1].strip() if ':' in cpu_info['stdout_lines'][0] else cpu_info['stdout_lines'][0]
+        # CPU information, read directly instead of spawning a process
+        try:
+            with open('/proc/cpuinfo') as f:
+                for line in f:
+                    if line.startswith('model name'):
+                        info['cpu'] = line.split(':', 1)[1].strip()
+                        break
+        except OSError:
+            pass
         
-        # Get memory information
-        mem_info = self.execute_command("free -h")
-        if mem_info['status'] == 0:
-            info['memory'] = mem_info['stdout'].strip()
+        # Memory information
+        if results['memory']['status'] == 0:
+            info['memory'] = results['memory']['stdout'].strip()
         
-        # Get disk information
-        disk_info = self.execute_command("df -h")
-        if disk_info['status'] == 0:
-            info['disk'] = disk_info['stdout'].strip()
+        # Disk information
+        if results['disk']['status'] == 0:
+            info['disk'] = results['disk']['stdout'].strip()
         
         return info
 
+class CommandRing:
+    """
+    A submission queue for running commands in the background.
+    
+    Commands are submitted without waiting for them to finish and their
+    results are collected later with reap(), in completion order.
+    """
+    
+    def __init__(self, terminal: TerminalController, depth: int = 8):
+        """
+        Initialize the CommandRing.
+        
+        Args:
+            terminal: The controller used to execute the commands.
+            depth: Maximum number of commands running at the same time.
+        """
+        self.terminal = terminal
+        self._pool = ThreadPoolExecutor(max_workers=depth)
+        self._cq: Deque[Future] = deque()
+    
+    def submit(self, command: str, **kwargs) -> Future:
+        """
+        Start executing a command without waiting for it.
+        
+        Args:
+            command: The command to execute.
+            **kwargs: Additional arguments passed to execute_command.
+            
+        Returns:
+            A future resolving to the command result.
+        """
+        future = self._pool.submit(self.terminal.execute_command, command, **kwargs)
+        self._cq.append(future)
+        return future
+    
+    def reap(self, max_results: Optional[int] = None,
+             block: bool = True) -> Iterator[Dict[str, Union[int, str, bytes, List[str], List[bytes]]]]:
+        """
+        Collect results of submitted commands as they complete.
+        
+        Args:
+            max_results: Maximum number of results to collect, or None for all.
+            block: Whether to wait for running commands. If False, only
+                   commands that have already finished are collected.
+            
+        Yields:
+            Command results, in completion order.
+        """
+        reaped = 0
+        while self._cq and (max_results is None or reaped < max_results):
+            done = [future for future in self._cq if future.done()]
+            if not done:
+                if not block:
+                    return
+                done, _ = wait(self._cq, return_when=FIRST_COMPLETED)
+            for future in done:
+                if max_results is not None and reaped >= max_results:
+                    return
+                self._cq.remove(future)
+                reaped += 1
+                yield future.result()
+    
+    def close(self):
+        """
+        Wait for running commands and stop the worker threads.
+        """
+        self._pool.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 # Example usage
 if __name__ == "__main__":
+    # No timestamps needed for the example, which saves a strftime per record
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(name)s:%(levelname)s:%(message)s'
+    )
+    
     # Create a terminal controller
     terminal = TerminalController()
     
@@ -8,25 +8,68 @@ web navigation, element interaction, and content extraction.
 
 import os
 import time
+import queue
 import logging
-from typing import Dict, List, Optional, Tuple, Union, Any
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException, 
     NoSuchElementException, 
     ElementNotInteractableException,
-    StaleElementReferenceException
+    StaleElementReferenceException,
+    JavascriptException,
+    ScriptTimeoutException,
+    WebDriverException
 )
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+# lxml is optional; it parses page sources in C, several times faster than html.parser
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError:
+    lxml_etree = lxml_html = None
+
+# Elements whose text is never part of the readable page content
+_NON_CONTENT_TAGS = ("script", "style", "noscript", "template", "svg")
+
+def _lxml_page_text(source: str) -> str:
+    """
+    Extract the readable text of an HTML document with lxml.
+    """
+    tree = lxml_html.fromstring(source)
+    lxml_etree.strip_elements(tree, *_NON_CONTENT_TAGS, with_tail=False)
+    return " ".join(text.strip() for text in _TEXT_NODES(tree))
+
+def _soup_page_text(source: str) -> str:
+    """
+    Extract the readable text of an HTML document with BeautifulSoup.
+    """
+    soup = BeautifulSoup(source, 'html.parser')
+    for tag in soup(_NON_CONTENT_TAGS):
+        tag.decompose()
+    return soup.get_text(separator=' ', strip=True)
+
+# The parser is chosen once; scripts, styles and other non-content subtrees are
+# dropped before the text nodes are walked
+if lxml_html is not None:
+    _TEXT_NODES = lxml_etree.XPath("//text()[normalize-space()]")
+    _page_text = _lxml_page_text
+else:
+    _page_text = _soup_page_text
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,25 +77,200 @@ logging.basicConfig(
 )
 logger = logging.getLogger('web_interaction')
 
+# Chrome flags that turn off logging and background services (sync, component
+# updates, translation, first-run UI) that only cost CPU and memory in automation
+_QUIET_CHROME_FLAGS = (
+    "--log-level=3",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--mute-audio",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-features=TranslateUI,OptimizationHints",
+)
+
+# Seconds between checks while waiting for elements; WebDriverWait defaults to 0.5,
+# which adds up to half a second to every wait that succeeds
+WAIT_POLL_INTERVAL = 0.05
+
+# Script timeout in seconds that the driver is kept at between waits
+SCRIPT_TIMEOUT = 30
+
+# Locator strategies and special keys by name, in both upper and lower case,
+# so hot paths can skip getattr and str.upper
+_BY_MAP = {key: getattr(By, key) for key in vars(By) if key.isupper()}
+_BY_MAP.update({key.lower(): value for key, value in list(_BY_MAP.items())})
+_KEYS_MAP = {key: getattr(Keys, key) for key in vars(Keys) if key.isupper()}
+_KEYS_MAP.update({key.lower(): value for key, value in list(_KEYS_MAP.items())})
+
+def _by_method(by: str) -> str:
+    """
+    Look up the Selenium locator strategy for a name such as 'id' or 'CSS_SELECTOR'.
+    """
+    return _BY_MAP.get(by) or getattr(By, by.upper())
+
+def _key(name: str) -> str:
+    """
+    Look up the Selenium key code for a name such as 'enter' or 'TAB'.
+    """
+    return _KEYS_MAP.get(name) or getattr(Keys, name.upper())
+
+# Returns the visible text of the first element matching a CSS or XPath locator,
+# or null if there is none
+_LOCATOR_TEXT_SCRIPT = """
+var el = arguments[0] === 'xpath'
+  ? document.evaluate(arguments[1], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+  : document.querySelector(arguments[1]);
+return el ? (el.innerText === undefined ? el.textContent : el.innerText) : null;
+"""
+
+# Reads the requested properties (falling back to attributes) of each element;
+# 'text' means the rendered text, like WebElement.text
+_PREFETCH_SCRIPT = """
+var elements = arguments[0], names = arguments[1];
+return elements.map(function (el) {
+  var row = {};
+  names.forEach(function (name) {
+    var value = name === 'text' ? el.innerText : el[name];
+    if (value === undefined || value === null || typeof value === 'object' || typeof value === 'function') {
+      value = name === 'text' ? '' : el.getAttribute(name);
+    }
+    row[name] = value;
+  });
+  return row;
+});
+"""
+
+# Calls back once the document has finished loading
+_PAGE_LOAD_SCRIPT = """
+var done = arguments[arguments.length - 1];
+if (document.readyState === 'complete') { done(); return; }
+document.addEventListener('readystatechange', function () {
+  if (document.readyState === 'complete') { done(); }
+});
+"""
+
+# Runs a list of {op, by, sel, val} element operations in order inside the
+# browser, stopping at the first element that cannot be found
+_BATCH_SCRIPT = """
+var ops = arguments[0], results = [];
+for (var i = 0; i < ops.length; i++) {
+  var o = ops[i], el;
+  if (o.by === 'xpath') {
+    el = document.evaluate(o.sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+  } else {
+    el = document.querySelector(o.sel);
+  }
+  if (!el) { return {results: results, failed: i}; }
+  if (o.op === 'click') { el.click(); results.push(null); }
+  else if (o.op === 'scroll') { el.scrollIntoView(true); results.push(null); }
+  else if (o.op === 'set') {
+    el.value = o.val;
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    results.push(null);
+  }
+  else if (o.op === 'text') { results.push(el.innerText); }
+  else if (o.op === 'value') { results.push(el.value === undefined ? null : el.value); }
+  else if (o.op === 'attribute') { results.push(el.getAttribute(o.val)); }
+}
+return {results: results, failed: null};
+"""
+
+# Operations understood by WebController.batch
+_BATCH_OPS = frozenset(("click", "scroll", "set", "text", "value", "attribute"))
+
+def _kill_process(process: Optional[Any]):
+    """
+    Kill a chromedriver process that was never shut down through quit().
+    
+    Unlike quit(), this sends no HTTP request, so it cannot hang at
+    interpreter shutdown.
+    """
+    try:
+        if process is not None and process.poll() is None:
+            process.kill()
+    except Exception:
+        pass
+
+class PrefetchedElement(WebElement):
+    """
+    A WebElement that answers prefetched attributes without a round trip.
+    
+    It refers to the same browser element as the WebElement it was created
+    from, so it can be clicked, passed to scripts and used anywhere a
+    WebElement is accepted; only attributes that were not prefetched are
+    read from the browser.
+    """
+    
+    def __init__(self, element: WebElement, values: Dict[str, Any]):
+        super().__init__(element.parent, element.id)
+        self.element = element
+        self._values = values
+    
+    @property
+    def text(self) -> str:
+        if "text" in self._values:
+            return self._values["text"]
+        return super().text
+    
+    def get_attribute(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        return super().get_attribute(name)
+
 class WebController:
     """
     A class to handle web browser operations including navigation,
     element interaction, and content extraction.
     """
     
-    def __init__(self, headless: bool = True, download_dir: Optional[str] = None):
+    # chromedriver path shared by all controllers; see _chromedriver_path
+    _driver_path: Optional[str] = None
+    _driver_path_lock = threading.Lock()
+    
+    def __init__(self, headless: bool = True, download_dir: Optional[str] = None,
+                 lightweight: bool = False, page_load_strategy: str = "normal"):
         """
         Initialize the WebController with a Selenium WebDriver.
         
         Args:
             headless: Whether to run the browser in headless mode.
             download_dir: Directory to save downloaded files.
+            lightweight: Whether to skip images, stylesheets, plugins and other
+                         content that text and link extraction do not need.
+            page_load_strategy: When navigation returns: "normal" waits for all
+                                resources, "eager" only for the DOM to be ready,
+                                "none" returns immediately.
         """
         self.headless = headless
+        self.lightweight = lightweight
+        self.page_load_strategy = page_load_strategy
         self.download_dir = download_dir or os.path.join(os.getcwd(), 'downloads')
         self.driver = None
+        self._finalizer = None
+        self._script_timeout = None
         self.initialize_driver()
-        logger.info(f"Initialized WebController with headless={headless}")
+        logger.info(f"Initialized WebController with headless={headless}, lightweight={lightweight}")
+    
+    @classmethod
+    def _chromedriver_path(cls) -> str:
+        """
+        Get the chromedriver path, resolving it only once per process.
+        
+        ChromeDriverManager checks the installed Chrome version on every
+        install() call, which would delay each new controller.
+        
+        Returns:
+            The path to the chromedriver executable.
+        """
+        with cls._driver_path_lock:
+            if cls._driver_path is None or not os.path.exists(cls._driver_path):
+                cls._driver_path = ChromeDriverManager().install()
+            return cls._driver_path
     
     def initialize_driver(self):
         """
@@ -72,6 +290,9 @@ class WebController:
             chrome_options.add_argument("--window-size=1920,1080")
             chrome_options.add_argument("--disable-notifications")
             chrome_options.add_argument("--disable-popup-blocking")
+            for flag in _QUIET_CHROME_FLAGS:
+                chrome_options.add_argument(flag)
+            chrome_options.page_load_strategy = self.page_load_strategy
             
             # Set download preferences
             prefs = {
@@ -80,12 +301,28 @@ class WebController:
                 "download.directory_upgrade": True,
                 "safebrowsing.enabled": False
             }
+            
+            # Block content that text-only scraping never looks at
+            if self.lightweight:
+                prefs.update({
+                    f"profile.managed_default_content_settings.{setting}": 2
+                    for setting in ("images", "stylesheets", "plugins", "popups",
+                                    "geolocation", "notifications")
+                })
+                chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+                chrome_options.add_argument("--disable-webgl")
             chrome_options.add_experimental_option("prefs", prefs)
             
-            # Initialize the WebDriver
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Initialize the WebDriver, reusing one HTTP connection to chromedriver
+            # for every command instead of reconnecting
+            service = Service(self._chromedriver_path())
+            self.driver = webdriver.Chrome(service=service, options=chrome_options, keep_alive=True)
             self.driver.set_page_load_timeout(30)
+            self.driver.set_script_timeout(SCRIPT_TIMEOUT)
+            self._script_timeout = SCRIPT_TIMEOUT
+            
+            # Last-resort cleanup if the controller is dropped without close()
+            self._finalizer = weakref.finalize(self, _kill_process, self.driver.service.process)
             
             logger.info("WebDriver initialized successfully")
             
@@ -93,6 +330,29 @@ class WebController:
             logger.error(f"Error initializing WebDriver: {str(e)}")
             raise
     
+    def _set_script_timeout(self, seconds: float):
+        """
+        Set the driver's script timeout, skipping the command if it is unchanged.
+        
+        Args:
+            seconds: The new script timeout.
+        """
+        if seconds != self._script_timeout:
+            self.driver.set_script_timeout(seconds)
+            self._script_timeout = seconds
+    
+    def _wait(self, timeout: float = 10) -> WebDriverWait:
+        """
+        Create a WebDriverWait that polls every WAIT_POLL_INTERVAL seconds.
+        
+        Args:
+            timeout: Maximum time to wait.
+            
+        Returns:
+            The wait object.
+        """
+        return WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL_INTERVAL)
+    
     def navigate_to(self, url: str) -> bool:
         """
         Navigate to a specified URL.
@@ -151,8 +411,8 @@ class WebController:
             The WebElement if found, None otherwise.
         """
         try:
-            by_method = getattr(By, by.upper())
-            element = WebDriverWait(self.driver, timeout).until(
+            by_method = _by_method(by)
+            element = self._wait(timeout).until(
                 EC.presence_of_element_located((by_method, value))
             )
             return element
@@ -176,19 +436,132 @@ class WebController:
             A list of WebElements if found, empty list otherwise.
         """
         try:
-            by_method = getattr(By, by.upper())
-            WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((by_method, value))
-            )
-            elements = self.driver.find_elements(by_method, value)
-            return elements
-        except (TimeoutException, NoSuchElementException):
+            by_method = _by_method(by)
+            
+            # Poll find_elements itself so a non-empty result needs one command
+            deadline = time.monotonic() + timeout
+            while True:
+                elements = self.driver.find_elements(by_method, value)
+                if elements:
+                    return elements
+                if time.monotonic() >= deadline:
+                    logger.warning(f"No elements found: {by}={value}")
+                    return []
+                time.sleep(WAIT_POLL_INTERVAL)
+        except NoSuchElementException:
             logger.warning(f"No elements found: {by}={value}")
             return []
         except Exception as e:
             logger.error(f"Error finding elements {by}={value}: {str(e)}")
             return []
     
+    def find_elements_prefetch(self, by: str, value: str,
+                               attrs: Tuple[str, ...] = ("text", "href"),
+                               timeout: int = 10) -> List[PrefetchedElement]:
+        """
+        Find multiple elements and read some of their attributes up front.
+        
+        The attributes of all elements are fetched by one script, so reading
+        them afterwards costs no further round trips, where a plain WebElement
+        would need one per element and attribute.
+        
+        Args:
+            by: The method to locate the elements (e.g., By.CLASS_NAME, By.CSS_SELECTOR).
+            value: The value to search for.
+            attrs: The attributes to prefetch; 'text' is the element's visible text.
+            timeout: Maximum time to wait for the elements.
+            
+        Returns:
+            A list of PrefetchedElements if found, empty list otherwise.
+        """
+        elements = self.find_elements(by, value, timeout)
+        if not elements:
+            return []
+        try:
+            rows = self.driver.execute_script(_PREFETCH_SCRIPT, elements, list(attrs))
+        except Exception as e:
+            logger.error(f"Error prefetching attributes for {by}={value}: {str(e)}")
+            rows = [{} for _ in elements]
+        return [PrefetchedElement(element, row) for element, row in zip(elements, rows)]
+    
+    def find_in(self, parent: Tuple[str, str], child: Tuple[str, str],
+                timeout: int = 10) -> Optional[Any]:
+        """
+        Find an element inside a parent element.
+        
+        When both locators use CSS selectors, or both use XPath, they are joined
+        into a single locator so the lookup needs one round trip, unless either
+        one is a selector group or union. Other cases locate the parent first
+        and then search within it.
+        
+        Args:
+            parent: A tuple of (by, value) locating the parent element.
+            child: A tuple of (by, value) locating the element within the parent.
+            timeout: Maximum time to wait for the element.
+            
+        Returns:
+            The WebElement if found, None otherwise.
+        """
+        parent_by, parent_value = parent[0].lower(), parent[1]
+        child_by, child_value = child[0].lower(), child[1]
+        
+        # Selector groups and XPath unions on either side cannot simply be
+        # concatenated, so those use the two-step lookup below
+        if parent_by == child_by == "css_selector" and "," not in parent_value + child_value:
+            return self.find_element("css_selector", f"{parent_value} {child_value}", timeout)
+        if parent_by == child_by == "xpath" and "|" not in parent_value + child_value:
+            relative = child_value.lstrip(".")
+            if not relative.startswith("/"):
+                relative = "//" + relative
+            return self.find_element("xpath", parent_value + relative, timeout)
+        
+        parent_element = self.find_element(*parent, timeout=timeout)
+        if parent_element is None:
+            return None
+        try:
+            return parent_element.find_element(_by_method(child_by), child_value)
+        except NoSuchElementException:
+            logger.warning(f"Element not found: {child[0]}={child_value} in {parent[0]}={parent_value}")
+            return None
+        except Exception as e:
+            logger.error(f"Error finding element {child[0]}={child_value} in {parent[0]}={parent_value}: {str(e)}")
+            return None
+    
+    def find_many_css(self, selectors: List[str]) -> Dict[str, Optional[Any]]:
+        """
+        Find the first element matching each of several CSS selectors.
+        
+        The selectors are joined into one querySelectorAll call that runs in the
+        browser, and each selector gets the first node in document order that
+        matches it, so the whole lookup needs a single round trip and does not wait.
+        
+        Args:
+            selectors: The CSS selectors to search for.
+            
+        Returns:
+            A dictionary mapping each selector to its first WebElement, or None
+            if nothing matched.
+        """
+        if not selectors:
+            return {}
+        try:
+            found = self.driver.execute_script(
+                "var sels = arguments[0], out = {}, pending = sels.length;"
+                "for (var i = 0; i < sels.length; i++) { out[sels[i]] = null; }"
+                "var nodes = document.querySelectorAll(sels.join(','));"
+                "for (var n = 0; n < nodes.length && pending; n++) {"
+                "  for (var j = 0; j < sels.length; j++) {"
+                "    if (out[sels[j]] === null && nodes[n].matches(sels[j])) { out[sels[j]] = nodes[n]; pending--; }"
+                "  }"
+                "}"
+                "return out;",
+                list(selectors)
+            )
+            return found or dict.fromkeys(selectors)
+        except Exception as e:
+            logger.error(f"Error finding elements {selectors}: {str(e)}")
+            return dict.fromkeys(selectors)
+    
     def click_element(self, element_or_locator: Union[Any, Tuple[str, str]], 
                      timeout: int = 10) -> bool:
         """
@@ -204,19 +577,20 @@ class WebController:
         try:
             element = element_or_locator
             
-            # If a locator tuple is provided, find the element
+            # Wait until the element is clickable, locating it first if a locator
+            # tuple is provided
             if isinstance(element_or_locator, tuple):
                 by, value = element_or_locator
-                by_method = getattr(By, by.upper())
-                element = WebDriverWait(self.driver, timeout).until(
+                by_method = _by_method(by)
+                element = self._wait(timeout).until(
                     EC.element_to_be_clickable((by_method, value))
                 )
+            elif element:
+                element = self._wait(timeout).until(
+                    EC.element_to_be_clickable(element)
+                )
             
-            # Ensure element is clickable
             if element:
-                WebDriverWait(self.driver, timeout).until(
-                    EC.element_to_be_clickable((By.XPATH, element.get_attribute("outerHTML")))
-                )
                 element.click()
                 logger.info("Element clicked successfully")
                 return True
@@ -249,8 +623,8 @@ class WebController:
             # If a locator tuple is provided, find the element
             if isinstance(element_or_locator, tuple):
                 by, value = element_or_locator
-                by_method = getattr(By, by.upper())
-                element = WebDriverWait(self.driver, 10).until(
+                by_method = _by_method(by)
+                element = self._wait(10).until(
                     EC.presence_of_element_located((by_method, value))
                 )
             
@@ -287,8 +661,8 @@ class WebController:
             # If a locator tuple is provided, find the element
             if isinstance(element_or_locator, tuple):
                 by, value = element_or_locator
-                by_method = getattr(By, by.upper())
-                element = WebDriverWait(self.driver, 10).until(
+                by_method = _by_method(by)
+                element = self._wait(10).until(
                     EC.presence_of_element_located((by_method, value))
                 )
             
@@ -317,17 +691,34 @@ class WebController:
         Returns:
             True if key press was successful, False otherwise.
         """
+        return self.press_keys([key])
+    
+    def press_keys(self, keys: List[str]) -> bool:
+        """
+        Press a sequence of keyboard keys in a single command.
+        
+        The keys go to the focused element through one W3C actions request,
+        so there is no separate round trip to look up the active element.
+        
+        Args:
+            keys: The keys to press in order (e.g., ["TAB", "ENTER"]).
+            
+        Returns:
+            True if the key presses were successful, False otherwise.
+        """
         try:
-            # Get the key attribute from Keys class
-            key_attr = getattr(Keys, key.upper())
+            # Get the key attributes from Keys class
+            actions = ActionChains(self.driver)
+            for key in keys:
+                key_attr = _key(key)
+                actions.key_down(key_attr).key_up(key_attr)
             
-            # Send the key to the active element
-            self.driver.switch_to.active_element.send_keys(key_attr)
-            logger.info(f"Key pressed: {key}")
+            actions.perform()
+            logger.info(f"Keys pressed: {', '.join(keys)}")
             return True
             
         except Exception as e:
-            logger.error(f"Error pressing key {key}: {str(e)}")
+            logger.error(f"Error pressing keys {', '.join(keys)}: {str(e)}")
             return False
     
     def scroll_to_element(self, element_or_locator: Union[Any, Tuple[str, str]]) -> bool:
@@ -346,8 +737,8 @@ class WebController:
             # If a locator tuple is provided, find the element
             if isinstance(element_or_locator, tuple):
                 by, value = element_or_locator
-                by_method = getattr(By, by.upper())
-                element = WebDriverWait(self.driver, 10).until(
+                by_method = _by_method(by)
+                element = self._wait(10).until(
                     EC.presence_of_element_located((by_method, value))
                 )
             
@@ -415,18 +806,18 @@ class WebController:
             The WebElement if found, None otherwise.
         """
         try:
-            by_method = getattr(By, by.upper())
+            by_method = _by_method(by)
             
             if condition == "presence":
-                element = WebDriverWait(self.driver, timeout).until(
+                element = self._wait(timeout).until(
                     EC.presence_of_element_located((by_method, value))
                 )
             elif condition == "visibility":
-                element = WebDriverWait(self.driver, timeout).until(
+                element = self._wait(timeout).until(
                     EC.visibility_of_element_located((by_method, value))
                 )
             elif condition == "clickable":
-                element = WebDriverWait(self.driver, timeout).until(
+                element = self._wait(timeout).until(
                     EC.element_to_be_clickable((by_method, value))
                 )
             else:
@@ -453,24 +844,44 @@ class WebController:
             True if page loaded, False otherwise.
         """
         try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
+            # Let the browser report completion through readystatechange instead
+            # of polling readyState; a page that is already loaded calls back at
+            # once. If the document is replaced while waiting, wait again on the
+            # new one. The script timeout is only changed when it differs from
+            # the wait, so the default wait costs a single command
+            deadline = time.monotonic() + timeout
+            try:
+                while True:
+                    self._set_script_timeout(timeout)
+                    try:
+                        self.driver.execute_async_script(_PAGE_LOAD_SCRIPT)
+                        break
+                    except JavascriptException:
+                        # The document unloaded before calling back
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            raise TimeoutException()
+            finally:
+                self._set_script_timeout(SCRIPT_TIMEOUT)
             logger.info("Page loaded completely")
             return True
-        except TimeoutException:
+        except (TimeoutException, ScriptTimeoutException):
+            # execute_async_script raises ScriptTimeoutException when the wait runs out
             logger.warning(f"Timeout waiting for page to load")
             return False
         except Exception as e:
             logger.error(f"Error waiting for page load: {str(e)}")
             return False
     
-    def extract_text(self, element_or_locator: Optional[Union[Any, Tuple[str, str]]] = None) -> str:
+    def extract_text(self, element_or_locator: Optional[Union[Any, Tuple[str, str]]] = None,
+                     max_chars: Optional[int] = None) -> str:
         """
         Extract text from an element or the entire page.
         
         Args:
             element_or_locator: Either a WebElement, a tuple of (by, value), or None for entire page.
+            max_chars: Maximum number of characters to return. For the entire page the
+                       text is trimmed in the browser, so only that much is transferred.
             
         Returns:
             The extracted text.
@@ -478,22 +889,38 @@ class WebController:
         try:
             # If no element is provided, extract text from the entire page
             if element_or_locator is None:
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                return soup.get_text(separator=' ', strip=True)
+                if max_chars is not None:
+                    return self.driver.execute_script(
+                        "var body = document.body;"
+                        "if (!body) { return ''; }"
+                        "return body.innerText.replace(/\\s+/g, ' ').trim().slice(0, arguments[0]);",
+                        max_chars
+                    ) or ""
+                return _page_text(self.driver.page_source)
             
             element = element_or_locator
             
             # If a locator tuple is provided, find the element
             if isinstance(element_or_locator, tuple):
                 by, value = element_or_locator
-                by_method = getattr(By, by.upper())
-                element = WebDriverWait(self.driver, 10).until(
+                
+                # CSS and XPath locators are resolved and read in a single script;
+                # only an element that is not there yet needs the waiting path
+                strategy = by.lower()
+                if strategy in ("css_selector", "xpath"):
+                    text = self.driver.execute_script(_LOCATOR_TEXT_SCRIPT, strategy, value)
+                    if text is not None:
+                        return text if max_chars is None else text[:max_chars]
+                
+                by_method = _by_method(by)
+                element = self._wait(10).until(
                     EC.presence_of_element_located((by_method, value))
                 )
             
             # Extract text from element
             if element:
-                return element.text
+                text = element.text
+                return text if max_chars is None else text[:max_chars]
             
             return ""
             
@@ -504,47 +931,42 @@ class WebController:
             logger.error(f"Error extracting text: {str(e)}")
             return ""
     
-    def extract_links(self, element_or_locator: Optional[Union[Any, Tuple[str, str]]] = None) -> List[Dict[str, str]]:
+    def extract_links(self, element_or_locator: Optional[Union[Any, Tuple[str, str]]] = None,
+                      limit: Optional[int] = None) -> List[Dict[str, str]]:
         """
         Extract links from an element or the entire page.
         
         Args:
             element_or_locator: Either a WebElement, a tuple of (by, value), or None for entire page.
+            limit: Maximum number of links to return. Remaining anchors are not inspected.
             
         Returns:
             A list of dictionaries with 'text' and 'href' keys.
         """
         try:
-            links = []
-            
-            # If no element is provided, extract links from the entire page
-            if element_or_locator is None:
-                elements = self.driver.find_elements(By.TAG_NAME, "a")
-            else:
-                element = element_or_locator
-                
-                # If a locator tuple is provided, find the element
-                if isinstance(element_or_locator, tuple):
-                    by, value = element_or_locator
-                    by_method = getattr(By, by.upper())
-                    element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((by_method, value))
-                    )
-                
-                # Extract links from element
-                if element:
-                    elements = element.find_elements(By.TAG_NAME, "a")
-                else:
-                    return []
+            element = element_or_locator
             
-            # Process links
-            for link in elements:
-                href = link.get_attribute("href")
-                text = link.text.strip()
-                if href and text:
-                    links.append({"text": text, "href": href})
+            # If a locator tuple is provided, find the element
+            if isinstance(element_or_locator, tuple):
+                by, value = element_or_locator
+                by_method = _by_method(by)
+                element = self._wait(10).until(
+                    EC.presence_of_element_located((by_method, value))
+                )
             
-            return links
+            # Collect text and href of every anchor in the browser in one round trip;
+            # a null root means the entire page
+            links = self.driver.execute_script(
+                "var root = arguments[0] || document, limit = arguments[1], links = [];"
+                "var anchors = root.querySelectorAll('a');"
+                "for (var i = 0; i < anchors.length && (limit === null || links.length < limit); i++) {"
+                "  var text = (anchors[i].innerText || '').trim(), href = anchors[i].href;"
+                "  if (text && href && typeof href === 'string') { links.push({text: text, href: href}); }"
+                "}"
+                "return links;",
+                element, limit
+            )
+            return links or []
             
         except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
             logger.warning(f"Cannot extract links: {str(e)}")
@@ -568,8 +990,10 @@ class WebController:
             if not filename.lower().endswith('.png'):
                 filename += '.png'
             
-            # Take screenshot
-            self.driver.save_screenshot(filename)
+            # Take screenshot; Selenium returns False if the file could not be written
+            if not self.driver.save_screenshot(filename):
+                logger.error(f"Could not write screenshot to {filename}")
+                return False
             logger.info(f"Screenshot saved to {filename}")
             return True
         except Exception as e:
@@ -595,6 +1019,51 @@ class WebController:
             logger.error(f"Error executing JavaScript: {str(e)}")
             return None
     
+    def batch(self, ops: List[Tuple[str, Union[str, Tuple[str, str]], Any]]) -> Dict[str, Any]:
+        """
+        Run a sequence of element operations in a single round trip.
+        
+        The operations are executed in order by one script in the browser, so a
+        later step sees the effects of earlier ones. Supported operations are
+        'click', 'scroll', 'set' (assign the value and fire input/change events),
+        'text', 'value' and 'attribute' (read the attribute named by arg).
+        Elements are located without waiting.
+        
+        Args:
+            ops: A list of (op, locator, arg) tuples. The locator is a CSS selector
+                 or a tuple of (by, value) using css_selector or xpath; arg is the
+                 value for 'set' and the attribute name for 'attribute', and is
+                 ignored otherwise.
+            
+        Returns:
+            A dictionary with 'success' and 'results', holding one entry per
+            operation that ran (the value read, or None). On failure 'message'
+            describes the problem.
+        """
+        payload = []
+        for op, locator, arg in ops:
+            if op not in _BATCH_OPS:
+                return {"success": False, "results": [], "message": f"Unknown operation: {op}"}
+            by, value = ("css_selector", locator) if isinstance(locator, str) else locator
+            by = by.lower()
+            if by not in ("css_selector", "xpath"):
+                return {"success": False, "results": [], "message": f"Unsupported locator: {by}"}
+            payload.append({"op": op, "by": by, "sel": value, "val": arg})
+        
+        try:
+            outcome = self.driver.execute_script(_BATCH_SCRIPT, payload)
+        except Exception as e:
+            logger.error(f"Error running batch: {str(e)}")
+            return {"success": False, "results": [], "message": str(e)}
+        
+        failed = outcome["failed"]
+        if failed is not None:
+            op, locator, _ = ops[failed]
+            logger.warning(f"Batch stopped at step {failed}: element not found for {op} {locator}")
+            return {"success": False, "results": outcome["results"],
+                    "message": f"Element not found for step {failed}: {op} {locator}"}
+        return {"success": True, "results": outcome["results"]}
+    
     def close(self):
         """
         Close the browser and clean up resources.
@@ -605,11 +1074,136 @@ class WebController:
                 logger.info("Browser closed successfully")
             except Exception as e:
                 logger.error(f"Error closing browser: {str(e)}")
+            finally:
+                self.driver = None
+                if self._finalizer is not None:
+                    self._finalizer.detach()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class WebControllerPool:
+    """
+    A fixed set of warm WebControllers handed out one at a time.
+    
+    Starting a browser takes seconds, so callers that run many short tasks
+    borrow a controller with acquire() and give it back with release(), which
+    clears cookies and loads a blank page before the next borrower gets it.
+    """
+    
+    def __init__(self, size: Optional[int] = None, headless: bool = True,
+                 download_dir: Optional[str] = None, lightweight: bool = False,
+                 page_load_strategy: str = "normal"):
+        """
+        Start the pool's browsers.
+        
+        Args:
+            size: Number of controllers to keep; defaults to the CPU count, at most 4.
+            headless: Whether to run the browsers in headless mode.
+            download_dir: Directory to save downloaded files.
+            lightweight: Whether the browsers skip content not needed for scraping.
+            page_load_strategy: When navigation returns; "eager" suits crawling.
+        """
+        self.size = size or min(4, os.cpu_count() or 1)
+        self._options = {"headless": headless, "download_dir": download_dir,
+                         "lightweight": lightweight, "page_load_strategy": page_load_strategy}
+        self._idle = queue.Queue()
+        self._controllers = []
+        
+        # Browsers start independently, so launch them at the same time
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(WebController, **self._options)
+                       for _ in range(self.size)]
+        try:
+            for future in futures:
+                self._controllers.append(future.result())
+        except Exception:
+            for future in futures:
+                if future.exception() is None:
+                    future.result().close()
+            raise
+        
+        for web in self._controllers:
+            self._idle.put(web)
+        logger.info(f"Initialized WebControllerPool with {self.size} controllers")
+    
+    def acquire(self, timeout: Optional[float] = None) -> WebController:
+        """
+        Borrow a controller, waiting until one is free.
+        
+        Args:
+            timeout: Maximum time to wait, or None to wait indefinitely.
+            
+        Returns:
+            An idle WebController.
+            
+        Raises:
+            queue.Empty: If no controller became free within the timeout.
+        """
+        return self._idle.get(timeout=timeout)
+    
+    def release(self, web: WebController):
+        """
+        Return a borrowed controller to the pool after resetting its browser.
+        
+        Args:
+            web: The controller obtained from acquire().
+        """
+        try:
+            web.driver.delete_all_cookies()
+            web.driver.get("about:blank")
+        except Exception as e:
+            # The browser is unusable; replace it so the pool keeps its size
+            logger.warning(f"Replacing pooled browser after failed reset: {str(e)}")
+            web.close()
+            replacement = WebController(**self._options)
+            self._controllers[self._controllers.index(web)] = replacement
+            web = replacement
+        self._idle.put(web)
+    
+    def scrape_urls(self, urls: List[str], fn: Callable[[WebController], Any]) -> List[Any]:
+        """
+        Visit independent URLs in parallel, one per pooled browser.
+        
+        Args:
+            urls: The URLs to visit.
+            fn: Called with the controller once it has navigated to a URL; its
+                return value is that URL's result.
+            
+        Returns:
+            The results in the order of urls, with None for URLs that could not
+            be loaded or whose callback failed.
+        """
+        def visit(url: str) -> Any:
+            web = self.acquire()
+            try:
+                if not web.navigate_to(url):
+                    return None
+                return fn(web)
+            except Exception as e:
+                logger.error(f"Error scraping {url}: {str(e)}")
+                return None
+            finally:
+                self.release(web)
+        
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(visit, urls))
     
-    def __del__(self):
+    def close(self):
         """
-        Destructor to ensure browser is closed when object is deleted.
+        Close every browser in the pool.
         """
+        for web in self._controllers:
+            web.close()
+        self._controllers = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
         self.close()
 
 # Example usage